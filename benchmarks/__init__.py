@@ -0,0 +1,36 @@
+"""
+Benchmarks for superadmin hot paths.
+
+Each module is runnable on its own against an in-memory SQLite database::
+
+    python -m benchmarks.fields
+
+The suite measures the views over the synthetic app and its results are
+compared against a stored baseline::
+
+    python -m benchmarks.suite --rows 100000 --output results.json
+    python -m benchmarks.compare baseline.json results.json
+"""
+
+# Python
+import os
+import time
+
+
+def setup():
+    """Configure django with the benchmark settings and create the tables"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", run_syncdb=True, verbosity=0)
+
+
+def timeit(function, number):
+    """Return the mean seconds per call of ``function``"""
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return (time.perf_counter() - start) / number
@@ -0,0 +1,83 @@
+""" Synthetic models used by benchmarks """
+
+# Django
+from django.db import models
+
+
+class Country(models.Model):
+    name = models.CharField(max_length=64)
+
+    def __str__(self):
+        return self.name
+
+
+class Customer(models.Model):
+    name = models.CharField(max_length=128)
+    country = models.ForeignKey(Country, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return self.name
+
+
+class Order(models.Model):
+    class StatusChoices(models.IntegerChoices):
+        NEW = 1, "New"
+        PAID = 2, "Paid"
+        SHIPPED = 3, "Shipped"
+
+    code = models.CharField(max_length=32)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    status = models.PositiveSmallIntegerField(choices=StatusChoices.choices)
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return self.code
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=64)
+    parent = models.ForeignKey("self", null=True, blank=True, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return self.name
+
+
+class Product(models.Model):
+    """Wide model with choices, slug and a chain of foreign keys"""
+
+    class KindChoices(models.TextChoices):
+        GOOD = "good", "Good"
+        SERVICE = "service", "Service"
+        BUNDLE = "bundle", "Bundle"
+
+    name = models.CharField(max_length=128)
+    slug = models.SlugField(max_length=128, unique=True)
+    sku = models.CharField(max_length=32)
+    kind = models.CharField(max_length=16, choices=KindChoices.choices)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    supplier = models.ForeignKey(Customer, on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    cost = models.DecimalField(max_digits=12, decimal_places=2)
+    tax = models.DecimalField(max_digits=5, decimal_places=2)
+    stock = models.IntegerField()
+    reserved = models.IntegerField()
+    minimum = models.IntegerField()
+    weight = models.FloatField()
+    width = models.FloatField()
+    height = models.FloatField()
+    depth = models.FloatField()
+    is_active = models.BooleanField(default=True)
+    is_featured = models.BooleanField(default=False)
+    is_taxable = models.BooleanField(default=True)
+    barcode = models.CharField(max_length=32)
+    brand = models.CharField(max_length=64)
+    model_number = models.CharField(max_length=64)
+    color = models.CharField(max_length=32)
+    size = models.CharField(max_length=32)
+    warranty = models.PositiveSmallIntegerField()
+    released = models.DateField()
+    updated_at = models.DateTimeField()
+    description = models.TextField()
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,59 @@
+""" Model sites of the benchmark app """
+
+# Superadmin
+from superadmin import ModelSite
+from superadmin.decorators import register
+
+# Local
+from .models import Order, Product
+
+
+@register(Order)
+class OrderSite(ModelSite):
+    list_fields = (
+        "code",
+        "customer",
+        "customer__country__name:Country",
+        "status",
+        "total",
+    )
+    detail_fields = ("code", ("customer", "customer__country"), "status", "total")
+    fields = ("code", "customer", "status", "total")
+    filter_fields = ("status", "customer")
+    search_params = ("code__icontains", "customer__name__icontains")
+    paginate_by = 20
+    queryset = Order.objects.order_by("pk")
+
+
+@register(Product)
+class ProductSite(ModelSite):
+    list_fields = (
+        "name",
+        "sku",
+        "kind",
+        "category",
+        "category__parent:Family",
+        "supplier__country__name:Country",
+        "price",
+        "stock",
+        "is_active",
+        "updated_at",
+    )
+    detail_fields = {
+        "General": ("name", ("sku", "barcode"), ("kind", "category"), "supplier"),
+        "Prices": (("price", "cost", "tax"), "is_taxable"),
+        "Stock": (
+            ("stock", "reserved", "minimum"),
+            ("weight", "width", "height", "depth"),
+        ),
+        "Other": (
+            ("brand", "model_number"),
+            ("color", "size"),
+            "released",
+            "description",
+        ),
+    }
+    filter_fields = ("kind", "category", "is_active")
+    search_params = ("name__icontains", "sku__icontains")
+    paginate_by = 50
+    queryset = Product.objects.order_by("pk")
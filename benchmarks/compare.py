@@ -0,0 +1,86 @@
+"""
+Compare the results of the suite against a stored baseline, the exit status
+is 1 when any scenario regressed beyond the threshold.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.1
+"""
+
+# Python
+import argparse
+import json
+import sys
+
+# Metric, True when bigger is better
+METRICS = (
+    ("rps", True),
+    ("p50", False),
+    ("p99", False),
+    ("memory", False),
+)
+
+
+def compare(baseline, current, threshold):
+    """Rows of (scenario, metric, before, after, change, regressed)"""
+    rows = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            continue
+        for metric, higher_is_better in METRICS:
+            old, new = before[metric], after[metric]
+            change = (new - old) / old if old else 0.0
+            regressed = -change > threshold if higher_is_better else change > threshold
+            rows.append((name, metric, old, new, change, regressed))
+        # One more query is a regression regardless of the timings
+        rows.append(
+            (
+                name,
+                "queries",
+                before["queries"],
+                after["queries"],
+                after["queries"] - before["queries"],
+                after["queries"] > before["queries"],
+            )
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    if baseline.get("rows") != current.get("rows"):
+        print(
+            f"warning: {baseline.get('rows')} rows in baseline, "
+            f"{current.get('rows')} in current",
+            file=sys.stderr,
+        )
+
+    regressions = 0
+    for name, metric, old, new, change, regressed in compare(
+        baseline, current, args.threshold
+    ):
+        if metric == "queries":
+            change = f"{change:+d}"
+        else:
+            change = f"{change * 100:+.1f}%"
+        mark = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{name:24} {metric:8} {old:12.2f} {new:12.2f} {change:>8}  {mark}")
+
+    missing = set(baseline["results"]) - set(current["results"])
+    for name in sorted(missing):
+        print(f"{name:24} missing in current results")
+    print(f"{regressions} regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Generators of synthetic data for the benchmarks, rows are inserted with
+bulk_create in batches so 1M rows fit on SQLite in a reasonable time.
+"""
+
+# Python
+import datetime
+import decimal
+
+BATCH_SIZE = 5000
+
+
+def bulk_create(model, objects):
+    batch = []
+    for object in objects:
+        batch.append(object)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def create_customers(number=100, countries=10):
+    from benchmarks.app.models import Country, Customer
+
+    Country.objects.bulk_create(
+        Country(pk=index + 1, name=f"Country {index}") for index in range(countries)
+    )
+    bulk_create(
+        Customer,
+        (
+            Customer(
+                pk=index + 1,
+                name=f"Customer {index}",
+                country_id=index % countries + 1,
+            )
+            for index in range(number)
+        ),
+    )
+    return list(range(1, number + 1))
+
+
+def create_orders(rows, customers):
+    from benchmarks.app.models import Order
+
+    bulk_create(
+        Order,
+        (
+            Order(
+                code=f"ORD-{index}",
+                customer_id=customers[index % len(customers)],
+                status=index % 3 + 1,
+                total=index % 1000,
+            )
+            for index in range(rows)
+        ),
+    )
+
+
+def create_categories(roots=5, children=5):
+    """Two levels of categories, return the pks of the leaves"""
+    from benchmarks.app.models import Category
+
+    Category.objects.bulk_create(
+        Category(pk=index + 1, name=f"Family {index}") for index in range(roots)
+    )
+    leaves = [
+        Category(
+            pk=roots + index * children + child + 1,
+            name=f"Category {index}.{child}",
+            parent_id=index + 1,
+        )
+        for index in range(roots)
+        for child in range(children)
+    ]
+    Category.objects.bulk_create(leaves)
+    return [category.pk for category in leaves]
+
+
+def create_products(rows, customers, categories):
+    from benchmarks.app.models import Product
+
+    kinds = [choice for choice, _ in Product.KindChoices.choices]
+    released = datetime.date(2020, 1, 1)
+    updated_at = datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc)
+    bulk_create(
+        Product,
+        (
+            Product(
+                name=f"Product {index}",
+                slug=f"product-{index}",
+                sku=f"SKU{index:08d}",
+                kind=kinds[index % len(kinds)],
+                category_id=categories[index % len(categories)],
+                supplier_id=customers[index % len(customers)],
+                price=decimal.Decimal(index % 500) + decimal.Decimal("0.99"),
+                cost=decimal.Decimal(index % 300),
+                tax=decimal.Decimal("12.00"),
+                stock=index % 1000,
+                reserved=index % 10,
+                minimum=5,
+                weight=index % 50 / 10,
+                width=10.0,
+                height=20.0,
+                depth=5.0,
+                is_active=index % 7 != 0,
+                is_featured=index % 11 == 0,
+                is_taxable=True,
+                barcode=f"{index:013d}",
+                brand=f"Brand {index % 40}",
+                model_number=f"M-{index % 900}",
+                color=("red", "green", "blue")[index % 3],
+                size=("S", "M", "L", "XL")[index % 4],
+                warranty=12,
+                released=released + datetime.timedelta(days=index % 1000),
+                updated_at=updated_at + datetime.timedelta(minutes=index),
+                description="Synthetic product for benchmarks",
+            )
+            for index in range(rows)
+        ),
+    )
+
+
+def create_menu_tree(nodes=500, roots=10, groups=7):
+    """
+    Tree of ``nodes`` menus: roots, groups under every root and leaves under
+    every group. Routes and groups are set here because bulk_create does not
+    send the signals that keep them.
+    """
+    from django.utils.text import slugify
+
+    from superadmin.models import Action, Menu
+
+    action = Action.objects.create(
+        to=Action.ToChoices.MODEL, app_label="app", element="country", name="Countries"
+    )
+    menus = []
+
+    def add(name, parent, is_group):
+        route = slugify(name)
+        if parent is not None:
+            route = f"{parent.route}/{route}"
+        menu = Menu(
+            pk=len(menus) + 1,
+            name=name,
+            route=route,
+            action=action,
+            parent=parent,
+            is_group=is_group,
+            sequence=len(menus),
+        )
+        menus.append(menu)
+        return menu
+
+    parents = []
+    for root in range(roots):
+        menu = add(f"Module {root}", None, True)
+        parents += [add(f"Group {root}.{group}", menu, True) for group in range(groups)]
+    for leaf in range(max(nodes - len(menus), 0)):
+        add(f"Item {leaf}", parents[leaf % len(parents)], False)
+    # The pks are explicit, so the parents are saved before its children in order
+    Menu.objects.bulk_create(menus, batch_size=BATCH_SIZE)
+    return len(menus)
+
+
+def create_data(rows):
+    customers = create_customers()
+    create_orders(rows, customers)
+    create_products(rows, customers, create_categories())
+    create_menu_tree()
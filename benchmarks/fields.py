@@ -0,0 +1,98 @@
+"""
+Per-cell cost of resolving list values, before and after compiling the field
+specifications into accessors.
+
+    python -m benchmarks.fields
+"""
+
+# Python
+import argparse
+
+from benchmarks import setup, timeit
+
+FIELDS = ("code", "status", "total", "customer__name", "customer__country__name")
+
+
+def legacy_get_field_value(object, field):
+    """Field value resolution as it was done before the compiled accessors"""
+    from django.core.exceptions import FieldDoesNotExist
+
+    if "__str__" in field:
+        return object
+    if object is None:
+        return object
+    field = field.split(":")[0]
+    names = field.split("__")
+    name = names.pop(0)
+    if not hasattr(object, name):
+        raise AttributeError(f"Does not exist attribute <{name}> for {str(object)}.")
+    if len(names):
+        attr = getattr(object, name)
+        return legacy_get_field_value(
+            attr() if callable(attr) else attr, "__".join(names)
+        )
+    try:
+        field = object._meta.get_field(name)
+        if hasattr(field, "choices") and field.choices:
+            return dict(field.choices).get(field.value_from_object(object))
+        return field.value_from_object(object)
+    except FieldDoesNotExist:
+        attr = getattr(object, name)
+        return attr() if callable(attr) else attr
+
+
+def create_orders(rows):
+    from benchmarks.app.models import Country, Customer, Order
+
+    country = Country.objects.create(name="Ecuador")
+    customers = [
+        Customer.objects.create(name=f"Customer {index}", country=country)
+        for index in range(10)
+    ]
+    Order.objects.bulk_create(
+        Order(
+            code=f"ORD-{index}",
+            customer=customers[index % len(customers)],
+            status=index % 3 + 1,
+            total=index,
+        )
+        for index in range(rows)
+    )
+    return list(Order.objects.select_related("customer__country"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from superadmin.services import FieldService
+    from benchmarks.app.models import Order
+
+    orders = create_orders(args.rows)
+    cells = len(orders) * len(FIELDS)
+
+    def before():
+        for order in orders:
+            for field in FIELDS:
+                legacy_get_field_value(order, field)
+
+    def after():
+        accessors = [FieldService.get_accessor(Order, field) for field in FIELDS]
+        for order in orders:
+            for accessor in accessors:
+                accessor.get_value(order)
+
+    after()  # Warm the accessor cache
+    before_cost = timeit(before, args.repeat) / cells
+    after_cost = timeit(after, args.repeat) / cells
+    print(f"cells per page: {cells}")
+    print(f"before: {before_cost * 1e6:.3f} us/cell")
+    print(f"after:  {after_cost * 1e6:.3f} us/cell")
+    print(f"speedup: {before_cost / after_cost:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Time and queries for building the urls of the site at startup, reading the
+menus from the database and from the routes manifest. The reverse caches of
+django are filled after both in the same way, its time is shown apart. The
+database is in memory, so the queries saved by the manifest cost almost
+nothing here; with a database server each one is a round trip.
+
+    python -m benchmarks.startup --menus 500
+"""
+
+# Python
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks import setup, timeit
+
+
+def create_menus(nodes):
+    """Menu tree whose groups are module views and whose leaves open the orders"""
+    from benchmarks.data import create_menu_tree
+    from superadmin.models import Action, Menu
+
+    create_menu_tree(nodes)
+    orders = Action.objects.create(
+        to=Action.ToChoices.MODEL, app_label="app", element="order", name="Orders"
+    )
+    module = Action.objects.create(
+        to=Action.ToChoices.CLASSVIEW,
+        app_label="superadmin",
+        element="ModuleView",
+        name="Module",
+    )
+    Menu.objects.filter(is_group=True).update(action=module)
+    Menu.objects.filter(is_group=False).update(action=orders)
+
+
+def build(manifest):
+    from superadmin import site
+
+    return site.get_urls(manifest=manifest)
+
+
+def populate(patterns):
+    """Reverse caches that the first request of a worker fills, the same for both"""
+    from django.urls.resolvers import RoutePattern, URLResolver
+
+    URLResolver(RoutePattern(""), patterns)._populate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--menus", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext, override_settings
+
+    from superadmin import settings, site
+    from superadmin.manifest import write
+
+    create_menus(args.menus)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "routes.json")
+    # The manifest is only used with a cache shared by the processes
+    cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(directory, "cache"),
+    }
+    try:
+        with override_settings(CACHES={settings.CACHE_ALIAS: cache}):
+            write(site, path)
+            settings.URLS_MANIFEST = path
+            print(f"manifest: {os.path.getsize(path) / 1024:.1f} KiB")
+
+            build(False), build(True)  # Warm imports
+            for name, manifest in (("database", False), ("manifest", True)):
+                with CaptureQueriesContext(connection) as context:
+                    patterns = build(manifest)
+                cost = timeit(lambda: build(manifest), args.repeat)
+                queries = len(context.captured_queries)
+                print(
+                    f"{name:8}: {cost * 1000:8.1f} ms  {queries} queries"
+                    f"  {len(patterns)} patterns"
+                )
+            cost = timeit(lambda: populate(patterns), args.repeat)
+            print(f"populate: {cost * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Reproducible suite over the synthetic app: requests per second, p50/p99
+latency, queries and peak memory of the views of the model sites, the
+filter and session views, the menu and the mass actions.
+
+    python -m benchmarks.suite --rows 100000 --output results.json
+
+The database is in memory unless BENCHMARK_DATABASE points to a file.
+"""
+
+# Python
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks import setup
+
+
+class Scenario:
+    """One measured action, ``run`` is called once by iteration"""
+
+    def __init__(self, name, run, repeat=None):
+        self.name = name
+        self.run = run
+        self.repeat = repeat
+
+    def measure(self, repeat, warmup=3):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        repeat = self.repeat or repeat
+        for _ in range(warmup):
+            self.run()
+        with CaptureQueriesContext(connection) as context:
+            self.run()
+        queries = len(context.captured_queries)
+
+        tracemalloc.start()
+        self.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            self.run()
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        return {
+            "iterations": repeat,
+            "rps": len(latencies) / sum(latencies),
+            "p50": percentile(latencies, 0.5) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "mean": statistics.mean(latencies) * 1000,
+            "queries": queries,
+            "memory": peak / 1024,
+        }
+
+
+def percentile(values, rank):
+    return values[min(int(rank * len(values)), len(values) - 1)]
+
+
+def request(client, method, url, data=None, status=200):
+    def run():
+        response = getattr(client, method)(url, data or {})
+        assert response.status_code == status, (url, response.status_code)
+
+    return run
+
+
+def get_scenarios(client, rows):
+    from django.urls import reverse
+
+    from benchmarks.app.models import Order, Product
+    from superadmin import site
+    from superadmin.menus import MenuService
+
+    orders, products = site.get_modelsite(Order), site.get_modelsite(Product)
+    user = client.user
+    middle = rows // 2
+
+    def menu_cold():
+        MenuService.bump()
+        MenuService.get_user_menu(user)
+
+    def menu_warm():
+        MenuService.get_user_menu(user)
+
+    # Below DATA_UPLOAD_MAX_NUMBER_FIELDS, like a selection sent by a browser
+    update_ids = list(range(1, min(rows, 500) + 1))
+    delete_ids = iter(range(rows, 0, -1))
+
+    def mass_delete():
+        ids = [next(delete_ids) for _ in range(100)]
+        request(
+            client, "post", reverse(orders.get_url_name("mass_delete")), {"ids": ids}
+        )()
+
+    return [
+        Scenario(
+            "list.order", request(client, "get", reverse(orders.get_url_name("list")))
+        ),
+        Scenario(
+            "list.order.last_page",
+            request(
+                client,
+                "get",
+                reverse(orders.get_url_name("list")),
+                {"page": (rows - 1) // orders.paginate_by + 1},
+            ),
+        ),
+        Scenario(
+            "list.product",
+            request(client, "get", reverse(products.get_url_name("list"))),
+        ),
+        Scenario(
+            "list.product.search",
+            request(
+                client,
+                "get",
+                reverse(products.get_url_name("list")),
+                {"search": "Product 12"},
+            ),
+        ),
+        Scenario(
+            "detail.order",
+            request(
+                client, "get", reverse(orders.get_url_name("detail"), args=[middle])
+            ),
+        ),
+        Scenario(
+            "detail.product",
+            request(
+                client,
+                "get",
+                reverse(products.get_url_name("detail"), args=[f"product-{middle}"]),
+            ),
+        ),
+        Scenario(
+            "update.order",
+            request(
+                client, "get", reverse(orders.get_url_name("update"), args=[middle])
+            ),
+        ),
+        Scenario(
+            "filter.customer",
+            request(
+                client,
+                "get",
+                reverse("site:filter", args=["app", "order", "customer"]),
+            ),
+        ),
+        Scenario(
+            "session.order",
+            request(
+                client,
+                "post",
+                reverse("site:session", args=["app", "order"]),
+                {"status": "1", "customer": "1"},
+            ),
+        ),
+        Scenario("menu.cold", menu_cold),
+        Scenario("menu.warm", menu_warm),
+        Scenario(
+            "mass_update.order",
+            request(
+                client,
+                "post",
+                reverse(orders.get_url_name("mass_update")),
+                {"ids": update_ids, "field": "status", "value": "2"},
+            ),
+        ),
+        # Every iteration deletes other 100 orders, so it is the last one
+        Scenario(
+            "mass_delete.order", mass_delete, repeat=min(50, max(rows // 100 - 5, 1))
+        ),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--only", nargs="*", help="names of the scenarios to run")
+    parser.add_argument("--output", help="path of the json results")
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from benchmarks.data import create_data
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = ["*"]
+    start = time.perf_counter()
+    create_data(args.rows)
+    loaded = time.perf_counter() - start
+    print(f"{args.rows} rows loaded in {loaded:.1f}s", file=sys.stderr)
+
+    client = Client()
+    client.user = User.objects.create_superuser("admin", "admin@example.com", "admin")
+    client.force_login(client.user)
+
+    results = {}
+    for scenario in get_scenarios(client, args.rows):
+        if args.only and scenario.name not in args.only:
+            continue
+        result = results[scenario.name] = scenario.measure(args.repeat)
+        print(
+            f"{scenario.name:24} {result['rps']:9.1f} req/s  p50 {result['p50']:8.2f}ms"
+            f"  p99 {result['p99']:8.2f}ms  {result['queries']:4} queries"
+            f"  {result['memory']:9.1f} KiB",
+            file=sys.stderr,
+        )
+
+    document = {
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": settings.DATABASES["default"]["NAME"],
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# Django
+from django.urls import path
+
+# Superadmin
+from superadmin import site
+
+urlpatterns = [path("", site.urls)]
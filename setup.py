@@ -12,7 +12,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/dbsiavichay/django-superadmin",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=("benchmarks", "benchmarks.*")),
     install_requires=[
         "pyyaml",
     ],
@@ -0,0 +1,199 @@
+""" Mass actions over a list of ids, by chunks and in background when they are big """
+
+# Python
+import logging
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+# Django
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, models, transaction
+
+# Local
+from .search import IndexedSearchBackend
+from .services import GenerationService
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchService:
+    """
+    Each chunk of ids is updated or deleted in its own transaction, so big
+    selections do not lock the tables during the whole action. Above the
+    background threshold of the model site the chunks are processed by a
+    local thread pool and the progress of the job is saved in the cache.
+    """
+
+    KEY = "superadmin:batch:%s"
+    UPDATE = "update"
+    DELETE = "delete"
+    RUNNING = "running"
+    DONE = "done"
+    ERROR = "error"
+    executor = None
+
+    @classmethod
+    def get_cache(cls):
+        return caches[settings.CACHE_ALIAS]
+
+    @classmethod
+    def is_shared_cache(cls):
+        """The progress of a background job is read by any process of the site"""
+        return not isinstance(cls.get_cache(), (DummyCache, LocMemCache))
+
+    @classmethod
+    def get_executor(cls):
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=settings.BATCH_WORKERS,
+                thread_name_prefix="superadmin-batch",
+            )
+        return cls.executor
+
+    @classmethod
+    def get_job(cls, job_id):
+        return cls.get_cache().get(cls.KEY % job_id)
+
+    @classmethod
+    def save_job(cls, job):
+        cls.get_cache().set(cls.KEY % job["id"], job, settings.BATCH_CACHE_TIMEOUT)
+
+    @classmethod
+    def run(cls, site, action, ids, values=None, user=None):
+        """Start the job, return it done or running in background"""
+        ids = list(dict.fromkeys(ids))
+        job = {
+            "id": uuid.uuid4().hex,
+            "model": site.model._meta.label_lower,
+            "action": action,
+            "user": getattr(user, "pk", None),
+            "total": len(ids),
+            "processed": 0,
+            "affected": 0,
+            "status": cls.RUNNING,
+            "error": None,
+        }
+        cls.save_job(job)
+        db = site.model._default_manager.db
+        # A background thread has its own connection, it can not see the open
+        # transaction
+        if (
+            len(ids) > site.batch_background_threshold
+            and not connections[db].in_atomic_block
+        ):
+            if cls.is_shared_cache():
+                cls.get_executor().submit(cls.process_in_thread, job, site, ids, values)
+                return job
+            warnings.warn(
+                "Background mass actions need a CACHE_ALIAS shared by the "
+                "processes to report their progress, the action runs in the request",
+                RuntimeWarning,
+            )
+        return cls.process(job, site, ids, values)
+
+    @classmethod
+    def process_in_thread(cls, job, site, ids, values):
+        try:
+            return cls.process(job, site, ids, values)
+        finally:
+            connections.close_all()
+
+    @classmethod
+    def process(cls, job, site, ids, values=None):
+        model = site.model
+        chunk_size = site.batch_chunk_size
+        try:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start : start + chunk_size]
+                with transaction.atomic(using=model._default_manager.db):
+                    if job["action"] == cls.DELETE:
+                        affected = cls.delete_chunk(site, chunk)
+                    else:
+                        affected = cls.update_chunk(site, chunk, values)
+                GenerationService.bump(model)
+                job["processed"] += len(chunk)
+                job["affected"] += affected
+                cls.save_job(job)
+            job["status"] = cls.DONE
+        except Exception as e:
+            logger.exception("Batch %s failed", job["id"])
+            job["status"], job["error"] = cls.ERROR, str(e)
+        cls.save_job(job)
+        return job
+
+    @classmethod
+    def delete_chunk(cls, site, ids):
+        model = site.model
+        queryset = model._default_manager.filter(pk__in=ids)
+        if cls.can_fast_delete(site):
+            return queryset._raw_delete(queryset.db)
+        _, deleted = queryset.delete()
+        return deleted.get(model._meta.label, 0)
+
+    @classmethod
+    def update_chunk(cls, site, ids, values):
+        model = site.model
+        queryset = model._default_manager.filter(pk__in=ids)
+        # save() only sets the auto_now fields that are in update_fields
+        auto_now = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False) and field.name not in values
+        ]
+        if cls.can_fast_update(site):
+            instance = model()
+            now = {field.name: field.pre_save(instance, False) for field in auto_now}
+            return queryset.update(**values, **now)
+        affected = 0
+        for instance in queryset.iterator():
+            for name, value in values.items():
+                setattr(instance, name, value)
+            instance.save(update_fields=[*values, *(field.name for field in auto_now)])
+            affected += 1
+        return affected
+
+    @classmethod
+    def has_receivers(cls, site):
+        """
+        The model site sends the signals of the model when it opts in with
+        batch_signals, for the receivers of the project, at the cost of a save
+        or a delete by object. The receivers of superadmin only bump the
+        generation, that is done by chunk, but the menus and the search
+        indexes need them.
+        """
+        from django.contrib.auth.models import Permission
+
+        from .models import Action, Menu
+
+        model = site.model
+        return (
+            site.batch_signals
+            or model in (Menu, Action, Permission)
+            or bool(IndexedSearchBackend.get_dependents(model))
+        )
+
+    @classmethod
+    def can_fast_update(cls, site):
+        return not site.prepopulate_slug and not cls.has_receivers(site)
+
+    @classmethod
+    def can_fast_delete(cls, site):
+        """Without signals, cascades or parents a chunk is one DELETE statement"""
+        opts = site.model._meta
+        if opts.parents or cls.has_receivers(site):
+            return False
+        if any(
+            hasattr(field, "bulk_related_objects") for field in opts.private_fields
+        ):
+            return False
+        return all(
+            related.on_delete is models.DO_NOTHING
+            for related in opts.get_fields(include_hidden=True)
+            if related.auto_created
+            and not related.concrete
+            and (related.one_to_one or related.one_to_many)
+        )
@@ -1,6 +1,5 @@
-# Models
-from .models import Menu
-from .utils import get_user_menu
+# Local
+from .menus import MenuService
 
 
 def menu(request):
@@ -8,8 +7,4 @@ def menu(request):
 
 
 def build_user_menu(user):
-    menu_list = list()
-    if user.is_authenticated and user.is_active:
-        object_list = Menu.objects.filter(parent__isnull=True)
-        menu_list = get_user_menu(object_list, user)
-    return menu_list
+    return MenuService.get_user_menu(user)
@@ -0,0 +1,172 @@
+""" Streaming writers for list exports """
+
+# Python
+import csv
+import datetime
+import decimal
+import math
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+# Django
+from django.db.models import Model
+from django.utils.encoding import force_str
+
+# Local
+from . import settings
+
+
+class Echo:
+    """File like object that return the written value instead of store it"""
+
+    def write(self, value):
+        return value
+
+
+class StreamBuffer:
+    """Unseekable file like object that keeps the bytes until they are popped"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+class Exporter:
+    """Base exporter, turns headers and an iterable of rows into chunks"""
+
+    content_type = None
+    extension = None
+
+    def __init__(self, headers, rows):
+        self.headers = headers
+        self.rows = rows
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    @classmethod
+    def to_text(cls, value):
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return settings.BOOLEAN_YES if value else settings.BOOLEAN_NO
+        if isinstance(value, (datetime.date, datetime.time)):
+            return value.isoformat()
+        if isinstance(value, Model):
+            return str(value)
+        return force_str(value)
+
+
+class CSVExporter(Exporter):
+    content_type = "text/csv"
+    extension = "csv"
+
+    def __iter__(self):
+        writer = csv.writer(Echo())
+        yield "\ufeff"
+        yield writer.writerow(self.headers)
+        for row in self.rows:
+            yield writer.writerow([self.to_text(value) for value in row])
+
+
+class XLSXExporter(Exporter):
+    """
+    Minimal XLSX writer, the sheet is written as a deflated zip stream with
+    inline strings so it never holds more than a chunk in memory.
+    """
+
+    content_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    extension = "xlsx"
+    chunk_size = 64 * 1024
+    ILLEGAL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+    FILES = {
+        "[Content_Types].xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            "</Types>"
+        ),
+        "_rels/.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>"
+        ),
+        "xl/workbook.xml": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+            "</workbook>"
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            "</Relationships>"
+        ),
+    }
+    SHEET_START = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        "<sheetData>"
+    )
+    SHEET_END = "</sheetData></worksheet>"
+
+    def __iter__(self):
+        buffer = StreamBuffer()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as workbook:
+            for name, content in self.FILES.items():
+                workbook.writestr(name, content)
+            with workbook.open(
+                "xl/worksheets/sheet1.xml", "w", force_zip64=True
+            ) as sheet:
+                sheet.write(self.SHEET_START.encode())
+                sheet.write(self.get_row(self.headers))
+                for row in self.rows:
+                    sheet.write(self.get_row(row))
+                    if buffer.size >= self.chunk_size:
+                        yield buffer.pop()
+                sheet.write(self.SHEET_END.encode())
+        yield buffer.pop()
+
+    def get_row(self, row):
+        cells = "".join(self.get_cell(value) for value in row)
+        return f"<row>{cells}</row>".encode()
+
+    def get_cell(self, value):
+        if (
+            isinstance(value, (int, float, decimal.Decimal))
+            and not isinstance(value, bool)
+            and math.isfinite(value)
+        ):
+            return f"<c><v>{value}</v></c>"
+        text = self.ILLEGAL_CHARACTERS.sub("", self.to_text(value))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+EXPORTERS = {
+    CSVExporter.extension: CSVExporter,
+    XLSXExporter.extension: XLSXExporter,
+}
@@ -0,0 +1,289 @@
+""" Streaming import of csv files validated with the form of the model site """
+
+# Python
+import copy
+import csv
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Django
+from django.db import connections, models, transaction
+from django.core.exceptions import ValidationError
+from django.forms import ModelChoiceField, ModelMultipleChoiceField, modelform_factory
+
+# Local
+from .services import GenerationService
+from . import settings
+
+# Keys by query of the existing objects, under the variables limit of SQLite
+IMPORT_QUERY_KEYS = 500
+
+
+def get_form_class(site):
+    return site.form_class or modelform_factory(site.model, fields=site.fields)
+
+
+class BatchChoiceMixin:
+    """Relation field that looks up the objects fetched once for the whole batch"""
+
+    objects = {}
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            return super().to_python(value)
+
+
+def get_batch_form_class(form_class, rows):
+    """
+    Subclass of the form whose relation fields are fetched with one query by
+    field for the batch, instead of two queries by row.
+    """
+    fields = dict(form_class.base_fields)
+    relations = []
+    for name, field in fields.items():
+        if not isinstance(field, ModelChoiceField) or isinstance(
+            field, ModelMultipleChoiceField
+        ):
+            continue
+        values = {data.get(name) for _, data in rows} - {None, ""}
+        key = field.to_field_name or "pk"
+        batch_field = copy.deepcopy(field)
+        batch_field.__class__ = type(
+            f"Batch{field.__class__.__name__}", (BatchChoiceMixin, field.__class__), {}
+        )
+        try:
+            batch_field.objects = {
+                str(getattr(object, key)): object
+                for object in field.queryset.filter(**{f"{key}__in": values})
+            }
+        except (ValueError, ValidationError):
+            batch_field.objects = {}
+        fields[name] = batch_field
+        relations.append(name)
+
+    class BatchForm(form_class):
+        def _get_validation_exclusions(self):
+            # The relation fields already checked that the objects exist
+            exclude = super()._get_validation_exclusions()
+            return exclude.__class__([*exclude, *relations])
+
+    BatchForm.base_fields = fields
+    return BatchForm
+
+
+def get_key(site, fields, data):
+    """
+    Natural key of a row with the values cleaned by the form fields, so it is
+    equal to the key of the saved object. None when a value is not valid.
+    """
+    key = []
+    for name in site.import_key:
+        model_field = site.model._meta.get_field(name)
+        value = data.get(name)
+        try:
+            if name in fields:
+                value = fields[name].clean(value)
+            else:
+                value = model_field.to_python(value)
+        except ValidationError:
+            return None
+        if isinstance(value, models.Model):
+            # The saved object has the value of the relation in its attname
+            value = getattr(value, model_field.target_field.attname)
+        key.append(value)
+    return tuple(key)
+
+
+def get_instance_key(site, instance):
+    return tuple(
+        getattr(instance, site.model._meta.get_field(name).attname)
+        for name in site.import_key
+    )
+
+
+def get_existing(site, keys):
+    """
+    Saved objects of the natural keys, with one query by chunk of keys that
+    filters each field of the key with ``__in``, the combinations that are
+    not a key are dropped here.
+    """
+    if not site.import_key or not keys:
+        return {}
+    names = [site.model._meta.get_field(name).attname for name in site.import_key]
+    keys = list(keys)
+    existing = {}
+    for start in range(0, len(keys), IMPORT_QUERY_KEYS):
+        chunk = set(keys[start : start + IMPORT_QUERY_KEYS])
+        lookup = {
+            f"{name}__in": {key[index] for key in chunk}
+            for index, name in enumerate(names)
+        }
+        for instance in site.model._default_manager.filter(**lookup):
+            key = get_instance_key(site, instance)
+            if key in chunk:
+                existing[key] = instance
+    return existing
+
+
+def validate_rows(site, rows):
+    """
+    Validate a batch of (line, data) with the form of the model site, return
+    the new instances, the changed instances with the names of the changed
+    fields and the errors by line.
+    """
+    form_class = get_batch_form_class(get_form_class(site), rows)
+    keys = {}
+    if site.import_key:
+        keys = {
+            line: get_key(site, form_class.base_fields, data) for line, data in rows
+        }
+    existing = get_existing(site, set(keys.values()) - {None})
+    creates, updates, changed, errors = {}, {}, set(), []
+    for line, data in rows:
+        key = keys.get(line) or line
+        instance = existing.get(key)
+        form = form_class(data=data, instance=instance)
+        if not form.is_valid():
+            errors.append({"line": line, "errors": form.errors.get_json_data()})
+            continue
+        # The last row of a repeated key wins
+        if instance is None:
+            creates[key] = form.save(commit=False)
+        elif form.has_changed():
+            updates[key] = form.save(commit=False)
+            changed.update(form.changed_data)
+    return list(creates.values()), list(updates.values()), changed, errors
+
+
+# Model site of the worker processes, set by the initializer before the fork
+worker_site = None
+
+
+def init_worker(site):
+    """The forked process gets the site of the parent, it is not pickled"""
+    global worker_site
+    worker_site = site
+
+
+def validate_rows_in_process(rows):
+    return validate_rows(worker_site, rows)
+
+
+class CSVImporter:
+    """
+    Read the uploaded file by batches of rows, validate them with the form of
+    the model site and write each batch with bulk_create and bulk_update in
+    its own transaction. The rows are validated in the process of the request
+    unless IMPORT_WORKERS enables a pool of forked processes.
+    """
+
+    def __init__(self, site, file):
+        self.site = site
+        self.model = site.model
+        self.file = file
+        self.fields = []
+        self.result = {
+            "total": 0,
+            "created": 0,
+            "updated": 0,
+            "invalid": 0,
+            "errors": [],
+        }
+
+    def read(self):
+        text = io.TextIOWrapper(self.file, encoding="utf-8-sig", newline="")
+        reader = csv.DictReader(text)
+        self.fields = self.get_update_fields(reader.fieldnames or [])
+        batch = []
+        for data in reader:
+            batch.append((reader.line_num, data))
+            self.result["total"] += 1
+            if len(batch) >= self.site.import_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_update_fields(self, header):
+        form_fields = get_form_class(self.site).base_fields
+        return [
+            field.name
+            for field in self.model._meta.concrete_fields
+            if field.name in header
+            and field.name in form_fields
+            and not field.primary_key
+        ]
+
+    def get_workers(self):
+        db = self.model._default_manager.db
+        if (
+            settings.IMPORT_WORKERS <= 1
+            or connections[db].in_atomic_block
+            or "fork" not in multiprocessing.get_all_start_methods()
+        ):
+            return 0
+        return settings.IMPORT_WORKERS
+
+    def run(self):
+        workers = self.get_workers()
+        if not workers:
+            for rows in self.read():
+                self.write(*validate_rows(self.site, rows))
+            return self.result
+
+        # Forked processes can not share the connections of the parent
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=init_worker,
+            initargs=(self.site,),
+        ) as executor:
+            pending = []
+            for rows in self.read():
+                pending.append(executor.submit(validate_rows_in_process, rows))
+                # Keep a few batches in flight, so memory is flat for any size
+                while len(pending) >= workers * 2:
+                    self.write(*pending.pop(0).result())
+            for future in pending:
+                self.write(*future.result())
+        return self.result
+
+    def write(self, creates, updates, changed, errors):
+        """Save a validated batch, rows created by previous batches are updated"""
+        fields = [name for name in self.fields if name in changed]
+        if self.site.import_key and creates:
+            existing = get_existing(
+                self.site,
+                {get_instance_key(self.site, instance) for instance in creates},
+            )
+            for instance in list(creates):
+                saved = existing.get(get_instance_key(self.site, instance))
+                if saved is not None:
+                    instance.pk = saved.pk
+                    instance._state.adding = False
+                    creates.remove(instance)
+                    updates.append(instance)
+                    fields = self.fields
+
+        with transaction.atomic(using=self.model._default_manager.db):
+            if creates:
+                self.model._default_manager.bulk_create(creates)
+            if updates and fields:
+                self.model._default_manager.bulk_update(updates, fields)
+        if creates or updates:
+            GenerationService.bump(self.model)
+            self.site.search_engine.update(
+                [instance for instance in creates + updates if instance.pk is not None]
+            )
+
+        self.result["created"] += len(creates)
+        self.result["updated"] += len(updates)
+        self.result["invalid"] += len(errors)
+        available = settings.IMPORT_MAX_ERRORS - len(self.result["errors"])
+        self.result["errors"].extend(errors[: max(available, 0)])
@@ -0,0 +1,245 @@
+""" Timings and queries of the views of the model sites, sent to pluggable sinks """
+
+# Python
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Django
+from django.db import connections, router
+from django.utils.module_loading import import_string
+
+# Local
+from . import settings
+
+logger = logging.getLogger("superadmin.instrumentation")
+
+
+class Measure:
+    """Measure of one request of a view: phases, queries, database time and rows"""
+
+    def __init__(self, site, action):
+        self.site = "%s.%s" % site.get_info()
+        self.action = action
+        self.phases = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.status = None
+        self.start = time.perf_counter()
+        self.total = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute wrapper of the connection, it counts every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+        return self.as_dict()
+
+    def as_dict(self):
+        return {
+            "site": self.site,
+            "action": self.action,
+            "status": self.status,
+            "total": self.total,
+            "python": self.total - self.db_time,
+            "db_time": self.db_time,
+            "queries": self.queries,
+            "rows": self.rows,
+            "phases": self.phases,
+        }
+
+
+class Sink:
+    """Receive the record of every measured request"""
+
+    def emit(self, record):
+        raise NotImplementedError
+
+
+class LoggingSink(Sink):
+    def emit(self, record):
+        logger.info(
+            "%s %s status=%s total=%.1fms db=%.1fms queries=%s rows=%s %s",
+            record["site"],
+            record["action"],
+            record["status"],
+            record["total"] * 1000,
+            record["db_time"] * 1000,
+            record["queries"],
+            record["rows"],
+            " ".join(
+                "%s=%.1fms" % (name, value * 1000)
+                for name, value in record["phases"].items()
+            ),
+        )
+
+
+class RingBufferSink(Sink):
+    """Last records of the process in memory, summarized by the stats view"""
+
+    records = deque(maxlen=settings.INSTRUMENTATION_BUFFER_SIZE)
+    lock = threading.Lock()
+
+    def emit(self, record):
+        with self.lock:
+            self.records.append(record)
+
+    @classmethod
+    def get_stats(cls):
+        with cls.lock:
+            records = list(cls.records)
+        groups = {}
+        for record in records:
+            groups.setdefault((record["site"], record["action"]), []).append(record)
+        stats = []
+        for (site, action), group in groups.items():
+            totals = sorted(record["total"] for record in group)
+            phases = {}
+            for record in group:
+                for name, value in record["phases"].items():
+                    phases[name] = phases.get(name, 0.0) + value
+            count = len(group)
+            stats.append(
+                {
+                    "site": site,
+                    "action": action,
+                    "count": count,
+                    "p50": totals[int(0.5 * (count - 1))] * 1000,
+                    "p95": totals[int(0.95 * (count - 1))] * 1000,
+                    "max": totals[-1] * 1000,
+                    "db_time": sum(record["db_time"] for record in group)
+                    * 1000
+                    / count,
+                    "queries": sum(record["queries"] for record in group) / count,
+                    "rows": sum(record["rows"] for record in group) / count,
+                    "phases": {
+                        name: value * 1000 / count for name, value in phases.items()
+                    },
+                }
+            )
+        return sorted(stats, key=lambda stat: stat["p95"], reverse=True)
+
+
+class StatsDSink(Sink):
+    """
+    Timers and counters in the StatsD line protocol over UDP, any local
+    listener on STATSD_HOST and STATSD_PORT can receive them.
+    """
+
+    def __init__(self):
+        self.address = (settings.STATSD_HOST, settings.STATSD_PORT)
+        self.prefix = settings.STATSD_PREFIX
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, record):
+        name = "%s.%s.%s" % (self.prefix, record["site"], record["action"])
+        lines = [
+            "%s.requests:1|c" % name,
+            "%s.total:%.3f|ms" % (name, record["total"] * 1000),
+            "%s.db_time:%.3f|ms" % (name, record["db_time"] * 1000),
+            "%s.queries:%s|g" % (name, record["queries"]),
+            "%s.rows:%s|g" % (name, record["rows"]),
+        ]
+        lines += [
+            "%s.%s:%.3f|ms" % (name, phase, value * 1000)
+            for phase, value in record["phases"].items()
+        ]
+        try:
+            self.socket.sendto("\n".join(lines).encode(), self.address)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=None)
+def get_sinks():
+    sinks = []
+    for sink in settings.INSTRUMENTATION_SINKS:
+        if isinstance(sink, str):
+            sink = import_string(sink)
+        sinks.append(sink() if isinstance(sink, type) else sink)
+    return sinks
+
+
+def emit(record):
+    for sink in get_sinks():
+        try:
+            sink.emit(record)
+        except Exception:
+            logger.exception("Instrumentation sink %r failed", sink)
+
+
+class InstrumentationMixin:
+    """
+    Measure the phases of the generated views. It is only added to the view
+    classes when INSTRUMENTATION is enabled, so disabled it costs nothing.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.measure = measure = Measure(self.site, self.action)
+        connection = connections[router.db_for_read(self.site.model)]
+        # Drop the measures of responses that were never rendered
+        connection.execute_wrappers[:] = [
+            wrapper
+            for wrapper in connection.execute_wrappers
+            if not isinstance(wrapper, Measure)
+        ]
+        connection.execute_wrappers.append(measure)
+
+        def finish(response=None):
+            if measure in connection.execute_wrappers:
+                connection.execute_wrappers.remove(measure)
+            if response is not None:
+                measure.phases["render"] = time.perf_counter() - dispatched
+            emit(measure.finish())
+
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except Exception:
+            measure.status = 500
+            finish()
+            raise
+        measure.status = response.status_code
+        dispatched = time.perf_counter()
+        if getattr(response, "is_rendered", True):
+            finish()
+        else:
+            # The template is rendered by the handler after dispatch returns
+            response.add_post_render_callback(finish)
+        return response
+
+    def get_queryset(self):
+        with self.measure.phase("get_queryset"):
+            return super().get_queryset()
+
+    def get_context_data(self, **kwargs):
+        with self.measure.phase("get_context_data"):
+            context = super().get_context_data(**kwargs)
+        rows = context.get("site", {}).get("rows")
+        if rows is not None:
+            self.measure.rows = len(rows)
+        elif context.get("object") is not None:
+            self.measure.rows = 1
+        return context
+
+    def get_rows(self, queryset):
+        with self.measure.phase("get_rows"):
+            return super().get_rows(queryset)
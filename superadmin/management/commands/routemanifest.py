@@ -0,0 +1,38 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Local
+from superadmin import site
+from superadmin import settings
+from superadmin.manifest import is_shared_cache, write
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the manifest of the menu routes, the urls are built from it "
+        "without the database while the menus do not change"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.URLS_MANIFEST,
+            help="Path of the manifest, URLS_MANIFEST by default",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"]
+        if not path:
+            raise CommandError("Set URLS_MANIFEST or give the path with --output")
+        if not is_shared_cache():
+            raise CommandError(
+                "The manifest needs a CACHE_ALIAS shared with the workers, like "
+                "redis, memcached or the database cache"
+            )
+        try:
+            data = write(site, str(path))
+        except OSError as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(data['menus'])} menu routes written to {path}")
+        )
@@ -0,0 +1,43 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.apps import apps
+
+# Local
+from superadmin import site
+from superadmin.search import IndexedSearchBackend
+
+
+class Command(BaseCommand):
+    help = "Build or rebuild the search index of the model sites"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            help="Models like 'app_label.model_name', all indexed models by default",
+        )
+
+    def handle(self, *args, **options):
+        if options["models"]:
+            try:
+                models = [apps.get_model(label) for label in options["models"]]
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+        else:
+            models = list(site._registry)
+
+        for model in models:
+            if not site.is_registered(model):
+                raise CommandError(f"Model '{model._meta.label}' is not registered")
+            backend = site.get_modelsite(model).search_engine
+            if not isinstance(backend, IndexedSearchBackend):
+                if options["models"]:
+                    raise CommandError(
+                        f"Model '{model._meta.label}' does not use an indexed "
+                        "search backend"
+                    )
+                continue
+            total = backend.build()
+            self.stdout.write(f"{model._meta.label}: {total} objects indexed")
+
+        self.stdout.write(self.style.SUCCESS("Successfully search index was built"))
@@ -0,0 +1,132 @@
+""" Manifest of the menu routes, the urls are built from it without the database """
+
+# Python
+import json
+import os
+import tempfile
+import warnings
+
+# Django
+from django.conf import settings as django_settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import router
+
+# Local
+from .services import GenerationService
+
+VERSION = 2
+
+
+def is_shared_cache():
+    """
+    The menu generation is compared between the process that writes the
+    manifest and the workers, a cache by process gives each one its own.
+    """
+    return not isinstance(GenerationService.get_cache(), (DummyCache, LocMemCache))
+
+
+def get_fields(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def get_values(instance):
+    return [getattr(instance, name) for name in get_fields(type(instance))]
+
+
+def dump(site):
+    """Menus that give urls with their actions and permissions, every field"""
+    from django.contrib.auth.models import Permission
+
+    from .models import Action, Menu
+
+    # Read before the menus, a change while they are read gives other generation
+    generation = GenerationService.get(Menu)
+    menus = []
+    for menu in site.get_menus(manifest=False):
+        action = menu.action
+        if action.to == action.ToChoices.MODEL:
+            if not action.model or not site.is_registered(action.model):
+                continue
+        elif not action.view:
+            continue
+        menus.append(
+            [
+                get_values(menu),
+                get_values(action),
+                [get_values(permission) for permission in action.permissions.all()],
+            ]
+        )
+    return {
+        "version": VERSION,
+        "generation": generation,
+        "fields": [get_fields(model) for model in (Menu, Action, Permission)],
+        "menus": menus,
+    }
+
+
+def write(site, path):
+    """Replace the manifest atomically, a worker never reads it half written"""
+    data = dump(site)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return data
+
+
+def load(path, generation):
+    """
+    Menus of the manifest as loaded from the database, None when it can not
+    be used: other format, fields that changed with a migration or a menu
+    generation that is not ``generation``.
+    """
+    from django.contrib.auth.models import Permission
+
+    from .models import Action, Menu
+
+    if not is_shared_cache():
+        warnings.warn(
+            "URLS_MANIFEST needs a CACHE_ALIAS shared by the processes, the "
+            "urls are built from the database",
+            RuntimeWarning,
+        )
+        return None
+    try:
+        with open(path) as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        if django_settings.DEBUG and not isinstance(error, FileNotFoundError):
+            print("DEBUG: Invalid routes manifest %s: %s" % (path, error))
+        return None
+    models = (Menu, Action, Permission)
+    if (
+        not isinstance(data, dict)
+        or data.get("version") != VERSION
+        or data.get("generation") != generation
+        or data.get("fields") != [get_fields(model) for model in models]
+    ):
+        return None
+
+    menu_fields, action_fields, permission_fields = data["fields"]
+    databases = [router.db_for_read(model) for model in models]
+    menus = []
+    for menu_values, action_values, permissions_values in data["menus"]:
+        menu = Menu.from_db(databases[0], menu_fields, menu_values)
+        action = Action.from_db(databases[1], action_fields, action_values)
+        # The same cache that prefetch_related("action__permissions") leaves
+        permissions = action.permissions.get_queryset()
+        permissions._result_cache = [
+            Permission.from_db(databases[2], permission_fields, values)
+            for values in permissions_values
+        ]
+        permissions._prefetch_done = True
+        action._prefetched_objects_cache = {"permissions": permissions}
+        menu.action = action
+        menus.append(menu)
+    return menus
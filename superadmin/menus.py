@@ -0,0 +1,194 @@
+""" Menu tree and routes built in memory, trees are cached by user permissions """
+
+# Python
+from typing import NamedTuple
+
+# Django
+from django.core.cache import caches
+
+# Local
+from .models import Action, Menu
+from .services import GenerationService, PermissionService
+from . import settings
+
+
+class MenuNode(NamedTuple):
+    """Menu with everything the tree needs, loaded without extra queries"""
+
+    id: int
+    parent: int
+    name: str
+    route: str
+    url: str
+    icon: str
+    is_group: bool
+    any_permissions: tuple  # Some of them is needed, empty when is not required
+    all_permissions: tuple  # All of them are needed
+    breadcrumbs: tuple = ()  # (name, url) of the ancestors and the menu
+
+    def has_permissions(self, permissions):
+        """Same rules of Action.has_permissions over a set of permissions"""
+        if self.any_permissions and not any(
+            perm in permissions for perm in self.any_permissions
+        ):
+            return False
+        return all(perm in permissions for perm in self.all_permissions)
+
+
+class MenuGraph(NamedTuple):
+    nodes: dict  # pk: MenuNode
+    children: dict  # parent pk: [pk]
+    routes: dict  # Trie of route segments, the node is under the None key
+
+    def find_route(self, path):
+        """Node with the longest route that is a prefix of path"""
+        current, node = self.routes, None
+        for segment in path.split("/"):
+            current = current.get(segment)
+            if current is None:
+                break
+            node = current.get(None, node)
+        return node
+
+
+class MenuService:
+    """
+    The Menu, Action and permission graph is loaded with two queries and kept
+    by process until the menu generation changes, with a trie of its routes
+    for breadcrumbs. The tree of every set of permissions is saved in the
+    shared cache.
+    """
+
+    KEY = "superadmin:menu:%s:%s"
+    SUPERUSER = "superuser"
+    graphs = {}  # generation: MenuGraph
+
+    @classmethod
+    def get_generation(cls):
+        return GenerationService.get(Menu)
+
+    @classmethod
+    def bump(cls):
+        return GenerationService.bump(Menu)
+
+    @classmethod
+    def get_graph(cls, generation):
+        graph = cls.graphs.get(generation)
+        if graph is None:
+            from .sites import site
+
+            # The urls of the nodes are reversed with the routes of this generation
+            site.refresh_urls(generation)
+            graph = cls.load()
+            cls.graphs = {generation: graph}
+        return graph
+
+    @classmethod
+    def load(cls):
+        permissions = {}
+        through = Action.permissions.through
+        for action_id, codename in through.objects.values_list(
+            "action_id", "permission__codename"
+        ):
+            permissions.setdefault(action_id, []).append(f"auth.{codename}")
+
+        nodes, children = {}, {}
+        for menu in Menu.objects.select_related("action"):
+            action = menu.action
+            any_permissions = ()
+            if action.to == Action.ToChoices.MODEL:
+                any_permissions = tuple(
+                    f"{action.app_label}.{perm}_{action.element}"
+                    for perm in ("view", "add", "change", "delete")
+                )
+            nodes[menu.pk] = MenuNode(
+                id=menu.pk,
+                parent=menu.parent_id,
+                name=menu.name,
+                route=menu.route,
+                url=menu.get_url(),
+                icon=menu.icon_class or "",
+                is_group=menu.is_group,
+                any_permissions=any_permissions,
+                all_permissions=tuple(permissions.get(action.pk, ())),
+            )
+            children.setdefault(menu.parent_id, []).append(menu.pk)
+
+        routes = {}
+        pending = [(pk, ()) for pk in children.get(None, ())]
+        while pending:
+            pk, breadcrumbs = pending.pop()
+            node = nodes[pk]
+            breadcrumbs = (*breadcrumbs, (node.name, f"/{node.route}/"))
+            nodes[pk] = node = node._replace(breadcrumbs=breadcrumbs)
+            current = routes
+            for segment in node.route.split("/"):
+                current = current.setdefault(segment, {})
+            current[None] = node
+            pending.extend((child, breadcrumbs) for child in children.get(pk, ()))
+        return MenuGraph(nodes, children, routes)
+
+    @classmethod
+    def get_menu_in_path(cls, path):
+        """Menu of the longest route prefix of path, without queries"""
+        if not path:
+            return None
+        return cls.get_graph(cls.get_generation()).find_route(path)
+
+    @classmethod
+    def get_permissions(cls, user):
+        """Return the permissions of the user and its fingerprint"""
+        snapshot = PermissionService.get(user)
+        if snapshot.is_superuser:
+            return None, cls.SUPERUSER
+        return snapshot.permissions, snapshot.fingerprint
+
+    @classmethod
+    def build(cls, graph, permissions, parent=None):
+        nodes, children = graph.nodes, graph.children
+        menus = []
+        for pk in children.get(parent, ()):
+            node = nodes[pk]
+            menu = {
+                "id": node.id,
+                "name": node.name,
+                "url": node.url,
+                "icon": node.icon,
+                "submenus": cls.build(graph, permissions, parent=pk),
+                "is_root": not node.parent,
+                "is_group": node.is_group,
+            }
+            if not menu["submenus"] and (
+                node.is_group
+                or (permissions is not None and not node.has_permissions(permissions))
+            ):
+                continue
+            menus.append(menu)
+        return menus
+
+    @classmethod
+    def get_user_menu(cls, user, parent=None):
+        """Menu tree of the user, or the submenus of ``parent``"""
+        if not user.is_authenticated or not user.is_active:
+            return []
+        generation = cls.get_generation()
+        permissions, fingerprint = cls.get_permissions(user)
+        cache = caches[settings.CACHE_ALIAS]
+        key = cls.KEY % (generation, fingerprint)
+        tree = cache.get(key)
+        if tree is None:
+            tree = cls.build(cls.get_graph(generation), permissions)
+            cache.set(key, tree, settings.MENU_CACHE_TIMEOUT)
+        if parent is None:
+            return tree
+        return cls.find(tree, parent)
+
+    @classmethod
+    def find(cls, menus, pk):
+        for menu in menus:
+            if menu["id"] == pk:
+                return menu["submenus"]
+            submenus = cls.find(menu["submenus"], pk)
+            if submenus:
+                return submenus
+        return []
@@ -6,7 +6,6 @@ from django.utils.html import format_html
 from superadmin.shortcuts import get_slug_or_pk
 
 # Utils
-from superadmin.utils import import_class
 from superadmin import settings
 
 
@@ -14,18 +13,9 @@ class BreadcrumbMixin:
     """Clase base que contiene la información común de todas las subclases"""
 
     def get_menu_in_path(self, path):
-        Menu = import_class("superadmin.models", "Menu")
-        if not Menu:
-            return
-        if not path:
-            return
-
-        try:
-            menu = Menu.objects.get(route=path)
-            return menu
-        except Menu.DoesNotExist:
-            path = "/".join(path.split("/")[0:-1])
-            return self.get_menu_in_path(path)
+        from superadmin.menus import MenuService
+
+        return MenuService.get_menu_in_path(path)
 
     def get_breadcrumb_text(self, action):
         attr = "breadcrumb_%s_text" % action
@@ -37,10 +27,7 @@ class BreadcrumbMixin:
         return format_html(text)
 
     def get_base(self, menu):
-        base = [(menu.name, f"/{menu.route}/")]
-        if menu.parent:
-            base = self.get_base(menu.parent) + base
-        return base
+        return list(menu.breadcrumbs)
 
     def get_base_breadcrumbs(self):
         base_breadcrumbs = [(self.get_breadcrumb_text("home"), "/")]
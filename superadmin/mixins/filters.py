@@ -7,7 +7,7 @@ from django.http import Http404
 from django.db.models import Q
 
 # Local
-from ..services import FieldService, FilterService
+from ..services import CountService, FieldService, FilterService
 
 
 class FilterMixin:
@@ -37,7 +37,11 @@ class FilterMixin:
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        self.all_records = queryset.count()
+        self.all_records = None
+        # The cursor pagination never counts the rows
+        if not self.site.cursor_pagination:
+            counter = CountService.get_for_request(self.request, self.site)
+            self.all_records = counter.count(queryset)
         params = FilterService.get_params(self.site.model, self.request.session)
         queryset = FilterService.filter(queryset, params)
         return queryset
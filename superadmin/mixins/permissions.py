@@ -5,6 +5,9 @@ from django.contrib.auth.mixins import (
     PermissionRequiredMixin as DjangoPermissionRequiredMixin,
 )
 
+# Local
+from ..services import PermissionService
+
 
 """
 class MultiplePermissionRequiredModuleMixin(DjangoPermissionRequiredMixin):
@@ -49,4 +52,4 @@ class PermissionRequiredMixin(DjangoPermissionRequiredMixin):
         if all([user.is_authenticated, user.is_superuser, user.is_active]):
             return True
         perms = self.get_permission_required()
-        return any(user.has_perm(perm) for perm in perms)
+        return PermissionService.get(user).has_any_perms(perms)
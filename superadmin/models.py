@@ -1,7 +1,7 @@
 """ Models for buid menus """
 
 # Django
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from django.urls.exceptions import NoReverseMatch
 from django.utils.text import slugify
@@ -12,6 +12,7 @@ from django.conf import settings
 
 # Local
 from . import site
+from .services import PermissionService
 from .utils import import_class
 
 
@@ -70,14 +71,15 @@ class Action(models.Model):
             pass
             # return True
 
+        snapshot = PermissionService.get(user)
         if self.to == self.ToChoices.MODEL:
-            basic_perms = any(
-                user.has_perm(f"{self.app_label}.{perm}_{self.element}")
+            basic_perms = snapshot.has_any_perms(
+                f"{self.app_label}.{perm}_{self.element}"
                 for perm in ("view", "add", "change", "delete")
             )
         else:
             basic_perms = True
-        specific_perms = all(user.has_perm(perm) for perm in self.get_permissions())
+        specific_perms = snapshot.has_perms(self.get_permissions())
 
         return basic_perms and specific_perms
 
@@ -113,12 +115,17 @@ class Menu(models.Model):
 
     def get_route(self):
         route = (
-            f"{self.parent.get_route()}/{slugify(self.name)}"
+            f"{self.parent.route}/{slugify(self.name)}"
             if self.parent
             else slugify(self.name)
         )
         return route
 
+    def save(self, *args, **kwargs):
+        """The signals update the routes and groups in the same transaction"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def get_url(self):
         url_name = None
         reverse_url = True
@@ -3,6 +3,8 @@ from django.db.models import QuerySet
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.text import slugify
 from django.urls import path
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
 
 # Views
 from .views import (
@@ -14,8 +16,12 @@ from .views import (
     DeleteView,
     MassDeleteView,
     DuplicateView,
+    ExportView,
+    ImportView,
+    BatchView,
 )
 
+from .services import DetailPlan, FieldService, QueryService, UrlService
 from . import settings
 
 ALL_FIELDS = "__all__"
@@ -70,12 +76,31 @@ class ModelSite:
     # Options for build queryset
     queryset = None  # Specified custom queryset
     paginate_by = None  # Specified if ListView paginated by
+    list_values = False  # Fetch list rows with values_list() if list_fields are only columns
+    cursor_pagination = False  # Paginate by keyset cursors over order_by and pk, without COUNT
+    cache_counts = False  # Save counts in cache until the model changes
+    count_estimate = False  # Estimate unfiltered counts of big tables from db statistics
+    navigation_position = True  # Count the position of the object in detail and update navigation
+    conditional_requests = False  # Answer 304 to list and detail requests of unchanged pages
+    last_modified_field = None  # Datetime field like updated_at for Last-Modified and ETag of detail view
+    version_field = None  # Row version field that changes on every save, for ETag of detail view
+    export_chunk_size = 2000  # Rows fetched by each query of the streamed exports
+    batch_chunk_size = settings.BATCH_CHUNK_SIZE  # Ids updated or deleted by transaction in mass actions
+    batch_background_threshold = settings.BATCH_BACKGROUND_THRESHOLD  # Mass actions with more ids run in background
+    batch_signals = False  # Mass actions run one statement by chunk, True saves or deletes each object to send its signals
+    import_key = ()  # Natural key of the imported rows, rows with a saved key update it
+    import_batch_size = settings.IMPORT_BATCH_SIZE  # Rows validated and saved together by the csv import
 
     # Filter, ordering and search
     search_fields = ()  # Used for create search method by specified fields
     filter_fields = ()
+    filter_search_fields = {}  # Fields of the related model searched by the autocomplete of each relation filter
+    list_facets = False  # Show in list view the count of rows by value of the filter fields with choices
+    facet_max_choices = 20  # Filter fields with more values than it do not have facet
+    filter_page_size = settings.FILTER_PAGE_SIZE  # Choices by page of the relation filters autocomplete
     order_by = ()  # Used for crate ordering methods by specified fields
     search_params = []  # Used for define search params in list view
+    search_backend = None  # Class or dotted path of the search backend, default SEARCH_BACKEND setting
     # Urls
     url_list_suffix = "list"
     url_create_suffix = "create"
@@ -83,9 +108,12 @@ class ModelSite:
     url_detail_suffix = "detail"
     url_delete_suffix = "delete"
     url_duplicate_suffix = "duplicate"
+    url_export_suffix = "export"
+    url_import_suffix = "import"
 
     url_mass_update_suffix = "mass_update"
     url_mass_delete_suffix = "mass_delete"
+    url_batch_suffix = "batch"
 
     def __init__(self, model, **kwargs):
         self.model = model
@@ -128,6 +156,62 @@ class ModelSite:
         # )
         return info
 
+    @cached_property
+    def list_join_plan(self):
+        """Joins needed by list view, it is compiled once by model site"""
+        return QueryService.get_join_plan(self.model, self.list_fields)
+
+    @cached_property
+    def detail_plan(self):
+        """Fields, fieldsets and joins of detail view, compiled once by model site"""
+        return DetailPlan.compile(self.model, self.detail_fields)
+
+    @cached_property
+    def conditional_models(self):
+        """Models whose changes modify the list and detail pages"""
+        # The count models are joined by the filters and searches of the list
+        models = list(self.count_models)
+        for plan in (self.list_join_plan, self.detail_plan.join_plan):
+            for model in QueryService.get_plan_models(self.model, plan):
+                if model not in models:
+                    models.append(model)
+        return models
+
+    @cached_property
+    def count_models(self):
+        """Models whose changes modify the counts of the filtered lists"""
+        paths = []
+        for lookup in (*self.search_params, *self.filter_fields):
+            relations, _ = QueryService.get_relation_path(self.model, lookup)
+            if relations:
+                paths.append(FieldService.FIELD_SEPARATOR.join(relations))
+        models = [self.model]
+        for model in QueryService.get_plan_models(self.model, (paths, ())):
+            if model not in models:
+                models.append(model)
+        return models
+
+    @cached_property
+    def url_service(self):
+        return UrlService(self)
+
+    @cached_property
+    def site_views(self):
+        return {}
+
+    def get_view(self, view_class):
+        """Return the view of a SiteView, its class is built once by model site"""
+        if view_class not in self.site_views:
+            self.site_views[view_class] = view_class.get_view_class(self).as_view()
+        return self.site_views[view_class]
+
+    @cached_property
+    def search_engine(self):
+        backend = self.search_backend or settings.SEARCH_BACKEND
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        return backend(self)
+
     # Url methods
     def get_base_url_name(self, suffix):
         info = self.get_info()
@@ -156,7 +240,12 @@ class ModelSite:
             # url_name = "%s_%s_%s" % (*info, self.url_list_suffix)
             url_name = self.get_base_url_name("list")
             urlpatterns += [
-                path(route="", view=ListView.as_view(site=self), name=url_name)
+                path(route="", view=self.get_view(ListView), name=url_name),
+                path(
+                    route=f"{self.url_export_suffix}/",
+                    view=ExportView.as_view(site=self),
+                    name=self.get_base_url_name("export"),
+                ),
             ]
 
         if "create" in self.allow_views:
@@ -165,9 +254,23 @@ class ModelSite:
             urlpatterns += [
                 path(
                     route=f"{self.url_create_suffix}/",
-                    view=CreateView.as_view(site=self),
+                    view=self.get_view(CreateView),
                     name=url_create_name,
                 ),
+                path(
+                    route=f"{self.url_import_suffix}/",
+                    view=ImportView.as_view(site=self),
+                    name=self.get_base_url_name("import"),
+                ),
+            ]
+
+        if "update" in self.allow_views or "delete" in self.allow_views:
+            urlpatterns += [
+                path(
+                    route=f"{self.url_batch_suffix}/<str:job>/",
+                    view=BatchView.as_view(site=self),
+                    name=self.get_base_url_name("batch"),
+                ),
             ]
 
         if "update" in self.allow_views:
@@ -176,7 +279,7 @@ class ModelSite:
             urlpatterns += [
                 path(
                     route=f"{route_param}/{self.url_update_suffix}/",
-                    view=UpdateView.as_view(site=self),
+                    view=self.get_view(UpdateView),
                     name=url_update_name,
                 ),
                 path(
@@ -195,7 +298,7 @@ class ModelSite:
             urlpatterns += [
                 path(
                     route=url_detail,
-                    view=DetailView.as_view(site=self),
+                    view=self.get_view(DetailView),
                     name=url_detail_name,
                 ),
             ]
@@ -206,7 +309,7 @@ class ModelSite:
             urlpatterns += [
                 path(
                     route=f"{route_param}/{self.url_delete_suffix}/",
-                    view=DeleteView.as_view(site=self),
+                    view=self.get_view(DeleteView),
                     name=url_delete_name,
                 ),
                 path(
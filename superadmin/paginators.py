@@ -0,0 +1,395 @@
+""" Keyset (seek) pagination """
+
+# Python
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import operator
+import uuid
+from functools import reduce
+from typing import NamedTuple
+
+# Django
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    PageNotAnInteger,
+    Paginator as DjangoPaginator,
+)
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class Paginator(DjangoPaginator):
+    """Paginator that takes the count from a CountService"""
+
+    def __init__(self, *args, counter=None, **kwargs):
+        self.counter = counter
+        super().__init__(*args, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        return self.counter.count(self.object_list)
+
+    @cached_property
+    def estimated(self):
+        """The count comes from the statistics of the database, it can be short"""
+        return self.counter is not None and self.counter.is_estimate(self.object_list)
+
+    def validate_number(self, number):
+        if not (self.count and self.estimated):
+            return super().validate_number(number)
+        # The pages after an estimated count can have rows
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(_("That page number is not an integer"))
+        if number < 1:
+            raise EmptyPage(_("That page number is less than 1"))
+        return number
+
+    def page(self, number):
+        """Page of an estimated count, it reads one more row to know if it is last"""
+        if not (self.count and self.estimated):
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        if len(rows) > self.per_page:
+            self.count = max(self.count, bottom + len(rows))
+        else:
+            # The rows end in this page, so the count is exact
+            self.count = bottom + len(rows)
+        self.__dict__.pop("num_pages", None)
+        return self._get_page(rows[: self.per_page], number, self)
+
+
+class Key(NamedTuple):
+    """Ordering key: the lookup name, its direction and the model field"""
+
+    name: str
+    descending: bool
+    field: object
+    nullable: bool
+
+
+class KeysetService:
+    """
+    Ordering keys and seek queries shared by cursor pagination and navigation.
+    Null values of nullable keys are sorted as the greatest ones, last when
+    ascending and first when descending, on every database.
+    """
+
+    FIELD_SEPARATOR = "__"
+
+    @classmethod
+    def get_ordering(cls, queryset, order_by=()):
+        """
+        Return the ordering of ``queryset`` as a list of keys with the
+        primary key appended as tie breaker, so every key is unique.
+        """
+        model = queryset.model
+        names = order_by or queryset.query.order_by
+        if not names and queryset.query.default_ordering:
+            names = model._meta.ordering
+        ordering = []
+        for name in names:
+            if isinstance(name, F):
+                name = name.name
+            if not isinstance(name, str) or name == "?":
+                raise ImproperlyConfigured(
+                    "Keyset pagination only supports ordering by field names."
+                )
+            descending = name.startswith("-")
+            name = name.lstrip("-+")
+            name = cls.get_key_name(model, name)
+            ordering.append(Key(name, descending, *cls.get_key_field(model, name)))
+        if cls.get_pk_index(model, ordering) is None:
+            descending = ordering[-1].descending if ordering else False
+            ordering.append(Key("pk", descending, model._meta.pk, False))
+        return ordering
+
+    @classmethod
+    def get_pk_index(cls, model, ordering):
+        """Position of the primary key, it is not the last one in ``("pk", "name")``"""
+        for index, key in enumerate(ordering):
+            if key.name in ("pk", model._meta.pk.name):
+                return index
+        return None
+
+    @classmethod
+    def get_key_name(cls, model, name):
+        """Relations are compared by its primary key"""
+        field = cls.get_key_field(model, name)[0]
+        if field is not None and field.is_relation:
+            return f"{name}{cls.FIELD_SEPARATOR}pk"
+        return name
+
+    @classmethod
+    def get_key_field(cls, model, name):
+        """
+        Field of the key and if it can be null, also when a relation of the
+        path is nullable because of the outer join.
+        """
+        current, field, nullable = model, None, False
+        for attr in name.split(cls.FIELD_SEPARATOR):
+            if attr == "pk" and current is not None:
+                attr = current._meta.pk.name
+            try:
+                field = current._meta.get_field(attr)
+            except (FieldDoesNotExist, AttributeError):
+                return None, True
+            nullable = nullable or getattr(field, "null", True)
+            current = field.related_model
+        return field, nullable
+
+    @classmethod
+    def get_order_by(cls, ordering, reverse=False):
+        order_by = []
+        for key in ordering:
+            descending = key.descending != reverse
+            if not key.nullable:
+                order_by.append(f"{'-' if descending else ''}{key.name}")
+            elif descending:
+                order_by.append(F(key.name).desc(nulls_first=True))
+            else:
+                order_by.append(F(key.name).asc(nulls_last=True))
+        return order_by
+
+    @classmethod
+    def get_comparison(cls, key, value, lookup):
+        """Rows whose key is greater (gt) or less (lt) than value"""
+        if value is None:
+            if lookup == "gt":
+                return None
+            return Q(**{f"{key.name}__isnull": False})
+        query = Q(**{f"{key.name}__{lookup}": value})
+        if lookup == "gt" and key.nullable:
+            query |= Q(**{f"{key.name}__isnull": True})
+        return query
+
+    @classmethod
+    def get_equality(cls, key, value):
+        if value is None:
+            return Q(**{f"{key.name}__isnull": True})
+        return Q(**{key.name: value})
+
+    @classmethod
+    def get_seek_query(cls, ordering, values, forward=True):
+        """Rows strictly after (or before) the row with the key ``values``"""
+        terms = []
+        for index, key in enumerate(ordering):
+            lookup = "lt" if key.descending == forward else "gt"
+            comparison = cls.get_comparison(key, values[index], lookup)
+            if comparison is None:
+                continue
+            equals = [
+                cls.get_equality(previous, value)
+                for previous, value in zip(ordering[:index], values[:index])
+            ]
+            terms.append(reduce(operator.__and__, equals, comparison))
+        if not terms:
+            # Nothing is after the last key
+            return Q(pk__in=[])
+        return reduce(operator.__or__, terms)
+
+    @classmethod
+    def get_keys(cls, queryset, ordering):
+        return queryset.values_list(*(key.name for key in ordering))
+
+    @classmethod
+    def encode_value(cls, value):
+        """JSON value of a key without loss, the types json lacks are tagged"""
+        if isinstance(value, datetime.datetime):
+            return {"t": "datetime", "v": value.isoformat()}
+        if isinstance(value, datetime.date):
+            return {"t": "date", "v": value.isoformat()}
+        if isinstance(value, datetime.time):
+            return {"t": "time", "v": value.isoformat()}
+        if isinstance(value, datetime.timedelta):
+            return {
+                "t": "timedelta",
+                "v": [value.days, value.seconds, value.microseconds],
+            }
+        if isinstance(value, decimal.Decimal):
+            return {"t": "decimal", "v": str(value)}
+        if isinstance(value, uuid.UUID):
+            return {"t": "uuid", "v": value.hex}
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        return {"t": "str", "v": str(value)}
+
+    @classmethod
+    def decode_value(cls, value, field=None):
+        """Python value of an encoded key, validated by the field of the key"""
+        if isinstance(value, dict):
+            kind, data = value["t"], value["v"]
+            if kind == "datetime":
+                value = datetime.datetime.fromisoformat(data)
+            elif kind == "date":
+                value = datetime.date.fromisoformat(data)
+            elif kind == "time":
+                value = datetime.time.fromisoformat(data)
+            elif kind == "timedelta":
+                value = datetime.timedelta(*data)
+            elif kind == "decimal":
+                value = decimal.Decimal(data)
+            elif kind == "uuid":
+                value = uuid.UUID(data)
+            elif kind == "str":
+                value = data
+            else:
+                raise ValueError(f"Unknown type {kind}")
+        if value is None or field is None:
+            return value
+        return field.to_python(value)
+
+
+class CursorPage:
+    """Page with the interface of django's Page but without counting rows"""
+
+    def __init__(self, object_list, paginator, previous_cursor, next_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+        self.number = None
+
+    def __repr__(self):
+        return "<Cursor page>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset seeking on its ordering keys, the cursor is an opaque
+    token with the key of the boundary row, so it does not need OFFSET or COUNT.
+    """
+
+    NEXT = "n"
+    PREVIOUS = "p"
+    LAST = "last"
+
+    def __init__(self, queryset, per_page, order_by=()):
+        self.ordering = KeysetService.get_ordering(queryset, order_by)
+        self.pk_index = KeysetService.get_pk_index(queryset.model, self.ordering)
+        self.queryset = queryset.order_by(*KeysetService.get_order_by(self.ordering))
+        self.per_page = int(per_page)
+        self.count = None
+
+    def encode_cursor(self, direction, values):
+        values = [KeysetService.encode_value(value) for value in values]
+        data = json.dumps({"d": direction, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            direction, values = data["d"], data["v"]
+            if direction not in (self.NEXT, self.PREVIOUS) or len(values) != len(
+                self.ordering
+            ):
+                raise InvalidCursor("Invalid cursor")
+            values = [
+                KeysetService.decode_value(value, key.field)
+                for key, value in zip(self.ordering, values)
+            ]
+        except (
+            binascii.Error,
+            ValidationError,
+            ValueError,
+            TypeError,
+            KeyError,
+            AttributeError,
+        ):
+            raise InvalidCursor("Invalid cursor")
+        return direction, values
+
+    def page(self, cursor=None):
+        """Return the page after or before the cursor, or the first page"""
+        if cursor == self.LAST:
+            direction, values = self.PREVIOUS, None
+        elif cursor:
+            direction, values = self.decode_cursor(cursor)
+        else:
+            direction, values = self.NEXT, None
+        forward = direction == self.NEXT
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(
+                KeysetService.get_seek_query(self.ordering, values, forward)
+            )
+        if not forward:
+            queryset = queryset.order_by(
+                *KeysetService.get_order_by(self.ordering, reverse=True)
+            )
+        keys = KeysetService.get_keys(queryset, self.ordering)
+        keys = list(keys[: self.per_page + 1])
+        has_more = len(keys) > self.per_page
+        keys = keys[: self.per_page]
+        if not forward:
+            keys.reverse()
+
+        if forward:
+            has_previous, has_next = values is not None, has_more
+        else:
+            has_previous, has_next = has_more, cursor != self.LAST
+        previous_cursor = (
+            self.encode_cursor(self.PREVIOUS, keys[0])
+            if keys and has_previous
+            else None
+        )
+        next_cursor = (
+            self.encode_cursor(self.NEXT, keys[-1]) if keys and has_next else None
+        )
+        object_list = self.queryset.filter(pk__in=[key[self.pk_index] for key in keys])
+        return CursorPage(object_list, self, previous_cursor, next_cursor)
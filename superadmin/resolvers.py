@@ -0,0 +1,104 @@
+""" Resolver of the site, its patterns follow the changes of the menus """
+
+# Python
+import threading
+import time
+
+# Django
+from django.urls import clear_url_caches
+from django.urls.resolvers import RoutePattern, URLResolver
+
+# Local
+from . import settings
+
+
+class SiteResolver(URLResolver):
+    """
+    Resolver of the namespace of the site. Its patterns are built on the
+    first use, not when the urlconf is imported, and are rebuilt when the
+    menu generation of the shared cache changes. The generation is read at
+    most once every URLS_RELOAD_INTERVAL seconds, so the requests between
+    checks only use the patterns already built.
+
+    The first version is built from the manifest of routes when there is
+    one. Every version has its own inner resolver with its own reverse caches,
+    a rebuilt version is swapped in with one assignment and the requests in
+    course keep the version they started with.
+    """
+
+    def __init__(self, site):
+        super().__init__(RoutePattern(""), None, app_name="site", namespace=site.name)
+        self.site = site
+        self.lock = threading.Lock()
+        self.resolver = None
+        self.version = None
+        self.checked = 0.0
+
+    def get_resolver(self):
+        now = time.monotonic()
+        interval = settings.URLS_RELOAD_INTERVAL
+        if self.resolver is None or now - self.checked >= interval:
+            from .menus import MenuService
+
+            self.checked = now
+            version = MenuService.get_generation()
+            if self.resolver is None or version != self.version:
+                self.reload(version)
+        return self.resolver
+
+    def refresh(self, version):
+        """Build the patterns of ``version`` now, waiting for a build in course"""
+        if self.resolver is None or version != self.version:
+            self.checked = time.monotonic()
+            self.reload(version, wait=True)
+
+    def reload(self, version, wait=False):
+        # Only the first build waits, the other threads keep the current version
+        if not self.lock.acquire(blocking=wait or self.resolver is None):
+            return
+        try:
+            if self.resolver is not None and version == self.version:
+                return
+            # The manifest of routes is only for starting, the changes come from
+            # the database
+            resolver = URLResolver(
+                self.pattern,
+                self.site.get_urls(manifest=self.resolver is None),
+                app_name=self.app_name,
+                namespace=self.namespace,
+            )
+            resolver._populate()
+            self.resolver, self.version = resolver, version
+        finally:
+            self.lock.release()
+        # The namespaced resolvers of django keep the patterns of the old version
+        clear_url_caches()
+
+    @property
+    def url_patterns(self):
+        return self.get_resolver().url_patterns
+
+    @property
+    def reverse_dict(self):
+        return self.get_resolver().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        return self.get_resolver().namespace_dict
+
+    @property
+    def app_dict(self):
+        return self.get_resolver().app_dict
+
+    def _populate(self):
+        resolver = self.get_resolver()
+        resolver._populate()
+        self._callback_strs = resolver._callback_strs
+
+    def _is_callback(self, name):
+        return self.get_resolver()._is_callback(name)
+
+    def _reverse_with_prefix(self, lookup_view, _prefix, *args, **kwargs):
+        return self.get_resolver()._reverse_with_prefix(
+            lookup_view, _prefix, *args, **kwargs
+        )
@@ -0,0 +1,304 @@
+""" Search backends for ModelSite.search_params """
+
+# Python
+import re
+import time
+from functools import partial
+from itertools import groupby
+
+# Django
+from django.conf import settings as django_settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import connections, router, transaction
+from django.db.backends.utils import truncate_name
+from django.db.models import IntegerField
+from django.db.models.expressions import RawSQL
+
+# Local
+from .services import FieldService, FilterService
+
+
+class SearchBackend:
+    """Interface of the search backends, one instance by model site"""
+
+    def __init__(self, site):
+        self.site = site
+        self.model = site.model
+
+    def search(self, queryset, search):
+        raise NotImplementedError
+
+    def connect(self):
+        """Called when the model site is registered"""
+
+    def build(self):
+        """Build or rebuild the index, return the number of indexed objects"""
+        return 0
+
+    def update(self, objects):
+        """Update the index of the objects"""
+
+    def delete(self, objects):
+        """Remove the objects from the index"""
+
+
+class ORMSearchBackend(SearchBackend):
+    """Lookups of search_params over the database, without index"""
+
+    def search(self, queryset, search):
+        return FilterService.search(queryset, self.site.search_params, search)
+
+
+class IndexedSearchBackend(ORMSearchBackend):
+    """
+    Full text index of the fields of search_params in a side table: a FTS5
+    table on SQLite and a tsvector with GIN index on PostgreSQL. Other
+    databases, or an index that was not built yet, fall back to the ORM.
+    """
+
+    VENDORS = ("sqlite", "postgresql")
+    TABLE = "superadmin_search_%s"
+    WORDS = re.compile(r"\w+")
+    MISSING_INTERVAL = 60  # Seconds until a missing table is looked up again
+    dependents = {}  # model: [(backend, lookup to the indexed model)]
+
+    def __init__(self, site):
+        super().__init__(site)
+        self.tables = set()  # Aliases where the table exists
+        self.missing = {}  # Aliases without the table: time of the lookup
+        self.moving = set()  # Lookups whose last relation is saved in the related row
+
+    @classmethod
+    def get_dependents(cls, model):
+        return cls.dependents.get(model, ())
+
+    def connect(self):
+        """Track the models whose changes modify the documents of the index"""
+        targets = [(self.model, None)]
+        for path in self.get_paths():
+            names = path.split(FieldService.FIELD_SEPARATOR)
+            current = self.model
+            for index, name in enumerate(names[:-1]):
+                field = current._meta.get_field(name)
+                current = field.related_model
+                lookup = FieldService.FIELD_SEPARATOR.join(names[: index + 1])
+                if field.one_to_many or (field.one_to_one and not field.concrete):
+                    self.moving.add(lookup)
+                if (current, lookup) not in targets:
+                    targets.append((current, lookup))
+        for model, lookup in targets:
+            self.dependents.setdefault(model, []).append((self, lookup))
+
+    def get_paths(self):
+        """Field paths of search_params without its lookups"""
+        paths = []
+        for param in self.site.search_params:
+            names = param.split(FieldService.FIELD_SEPARATOR)
+            current = self.model
+            path = []
+            for name in names:
+                try:
+                    field = current._meta.get_field(name)
+                except (FieldDoesNotExist, AttributeError):
+                    break
+                path.append(name)
+                current = field.related_model
+            if path and not field.is_relation:
+                paths.append(FieldService.FIELD_SEPARATOR.join(path))
+            elif path:
+                raise ImproperlyConfigured(
+                    "Search param '%s' must end in a field with text." % param
+                )
+        return paths
+
+    def get_connection(self, using=None):
+        return connections[using or router.db_for_write(self.model)]
+
+    def get_table(self, connection):
+        name = self.TABLE % self.model._meta.db_table
+        return truncate_name(name, connection.ops.max_name_length())
+
+    def is_supported(self, connection):
+        if connection.vendor not in self.VENDORS:
+            return False
+        if connection.vendor == "sqlite":
+            return isinstance(self.model._meta.pk, IntegerField)
+        return True
+
+    def has_index(self, connection):
+        if connection.alias in self.tables:
+            return True
+        # Other process can build the index, the table is looked up again later
+        checked = self.missing.get(connection.alias)
+        if checked is not None and time.monotonic() - checked < self.MISSING_INTERVAL:
+            return False
+        if self.is_supported(connection) and (
+            self.get_table(connection) in connection.introspection.table_names()
+        ):
+            self.tables.add(connection.alias)
+            self.missing.pop(connection.alias, None)
+            return True
+        self.missing[connection.alias] = time.monotonic()
+        return False
+
+    def get_query(self, connection, search):
+        """Prefix query of the words of every term, all of them must match"""
+        words = [
+            word
+            for term in FilterService.get_search_terms(search)
+            for word in self.WORDS.findall(term)
+        ]
+        if not words:
+            return None
+        if connection.vendor == "sqlite":
+            return " AND ".join(f'"{word}"*' for word in words)
+        return " & ".join(f"{word}:*" for word in words)
+
+    def search(self, queryset, search):
+        connection = connections[queryset.db]
+        if not self.has_index(connection):
+            if django_settings.DEBUG and self.is_supported(connection):
+                print(
+                    "DEBUG: Search index not found: %s" % self.get_table(connection)
+                )
+            return super().search(queryset, search)
+        query = self.get_query(connection, search)
+        if query is None:
+            return queryset
+        table = connection.ops.quote_name(self.get_table(connection))
+        if connection.vendor == "sqlite":
+            sql = f"SELECT rowid FROM {table} WHERE {table} MATCH %s"
+        else:
+            sql = (
+                f"SELECT object_id FROM {table} "
+                "WHERE document @@ to_tsquery('simple', %s)"
+            )
+        return queryset.filter(pk__in=RawSQL(sql, [query]))
+
+    def get_documents(self, queryset):
+        """Yield (pk, text) with the values of every path of the objects"""
+        paths = self.get_paths()
+        rows = (
+            queryset.order_by("pk")
+            .values_list("pk", *paths)
+            .iterator(chunk_size=2000)
+        )
+        for pk, group in groupby(rows, key=lambda row: row[0]):
+            values = {
+                str(value) for row in group for value in row[1:] if value is not None
+            }
+            yield pk, " ".join(sorted(values))
+
+    def create_table(self, connection):
+        table = connection.ops.quote_name(self.get_table(connection))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            if connection.vendor == "sqlite":
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5("
+                    "document, tokenize = 'unicode61 remove_diacritics 2')"
+                )
+            else:
+                pk_type = self.model._meta.pk.rel_db_type(connection)
+                index = connection.ops.quote_name(
+                    truncate_name(
+                        "%s_document" % self.get_table(connection),
+                        connection.ops.max_name_length(),
+                    )
+                )
+                cursor.execute(
+                    f"CREATE TABLE {table} "
+                    f"(object_id {pk_type} PRIMARY KEY, document tsvector NOT NULL)"
+                )
+                cursor.execute(f"CREATE INDEX {index} ON {table} USING GIN (document)")
+
+    def write(self, connection, documents):
+        table = connection.ops.quote_name(self.get_table(connection))
+        documents = list(documents)
+        if not documents:
+            return 0
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.executemany(
+                    f"DELETE FROM {table} WHERE rowid = %s",
+                    [(pk,) for pk, _ in documents],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {table} (rowid, document) VALUES (%s, %s)",
+                    documents,
+                )
+            else:
+                cursor.executemany(
+                    f"INSERT INTO {table} (object_id, document) "
+                    "VALUES (%s, to_tsvector('simple', %s)) "
+                    "ON CONFLICT (object_id) "
+                    "DO UPDATE SET document = EXCLUDED.document",
+                    documents,
+                )
+        return len(documents)
+
+    def build(self, batch_size=2000):
+        connection = self.get_connection()
+        if not self.is_supported(connection):
+            raise ImproperlyConfigured(
+                "Search index of '%s' needs SQLite with integer primary key "
+                "or PostgreSQL."
+                % self.model._meta.label
+            )
+        self.create_table(connection)
+        self.tables.add(connection.alias)
+        self.missing.pop(connection.alias, None)
+        total, batch = 0, []
+        queryset = self.model._default_manager.using(connection.alias)
+        for document in self.get_documents(queryset):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                total += self.write(connection, batch)
+                batch = []
+        return total + self.write(connection, batch)
+
+    def update(self, objects):
+        connection = self.get_connection()
+        if not self.has_index(connection):
+            return
+        pks = [getattr(object, "pk", object) for object in objects]
+        queryset = self.model._default_manager.using(connection.alias).filter(
+            pk__in=pks
+        )
+        documents = list(self.get_documents(queryset))
+        self.write(connection, documents)
+        # The objects that do not exist anymore leave the index
+        found = {pk for pk, _ in documents}
+        self.delete([pk for pk in pks if pk not in found])
+
+    def delete(self, objects):
+        connection = self.get_connection()
+        if not self.has_index(connection):
+            return
+        table = connection.ops.quote_name(self.get_table(connection))
+        column = "rowid" if connection.vendor == "sqlite" else "object_id"
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE {column} = %s",
+                [(getattr(object, "pk", object),) for object in objects],
+            )
+
+    def update_on_commit(self, pks):
+        """Reindex the objects when the transaction in course commits"""
+        connection = self.get_connection()
+        if pks and self.has_index(connection):
+            transaction.on_commit(partial(self.update, pks), using=connection.alias)
+
+    def get_related(self, lookup, instance):
+        """Pks of the indexed objects that reach ``instance`` by ``lookup``"""
+        if not self.has_index(self.get_connection()):
+            return set()
+        queryset = self.model._default_manager.filter(**{lookup: instance.pk})
+        return set(queryset.values_list("pk", flat=True))
+
+    def update_related(self, lookup, instance, previous=()):
+        """
+        Reindex the objects that reach ``instance`` by ``lookup`` and the
+        ones that reached it before the change, ``previous``.
+        """
+        self.update_on_commit({*previous, *self.get_related(lookup, instance)})
@@ -1,14 +1,88 @@
 # Python
+import hashlib
 import operator
-from functools import reduce
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial, reduce
+from typing import NamedTuple
+from urllib.parse import quote
 
 # Django
-from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ObjectDoesNotExist,
+)
+from django.conf import settings as django_settings
+from django.core.cache import caches
 from django.forms.utils import pretty_name
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from django.db.models import Q
+from django.db import DatabaseError, connections
+from django.db.models import Count, Q
+from django.urls import NoReverseMatch, get_resolver, get_script_prefix, reverse
+from django.urls import get_urlconf
 
 from . import settings
+from .paginators import KeysetService
+
+
+class FieldAccessor(NamedTuple):
+    """
+    Compiled field specification like ``"customer__name:Client"``. It keeps
+    everything that does not depend on the instance so reading a cell only
+    walks the precomputed attribute chain.
+    """
+
+    STR = "str"
+    CHOICES = "choices"
+    RELATED = "related"
+    VALUE = "value"
+    ATTRIBUTE = "attribute"
+    DYNAMIC = "dynamic"
+
+    model: type
+    name: str
+    label: str
+    type: str
+    kind: str
+    field: object = None  # Model field at the end of the chain
+    choices: dict = None
+    path: tuple = ()  # Attributes walked before the last one
+    attr: str = ""  # Last attribute or the remaining path for dynamic kind
+    column: str = None  # Lookup usable in values_list(), only for concrete fields
+
+    def get_column_value(self, value):
+        """Value of a cell fetched with values_list() over ``column``"""
+        if self.kind == self.CHOICES:
+            return self.choices.get(value)
+        return value
+
+    def get_value(self, object):
+        if self.kind == self.STR:
+            return object
+        for name in self.path:
+            if object is None:
+                return None
+            object = getattr(object, name)
+        if object is None:
+            return None
+        if self.kind == self.VALUE:
+            return getattr(object, self.attr)
+        if self.kind == self.CHOICES:
+            return self.choices.get(getattr(object, self.attr))
+        if self.kind == self.RELATED:
+            if self.field.one_to_many or self.field.many_to_many:
+                raise ImproperlyConfigured(
+                    "OneToMany or ManyToMany is not supported: '%s' " % self.field.name
+                )
+            try:
+                return getattr(object, self.attr)
+            except ObjectDoesNotExist:
+                return None
+        if self.kind == self.ATTRIBUTE:
+            return FieldService.get_attribute_value(object, self.attr)
+        return FieldService.resolve_value(object, self.attr)
 
 
 class FieldService:
@@ -16,64 +90,139 @@ class FieldService:
     LABEL_SEPARATOR = ":"
 
     @classmethod
-    def get_field(cls, model, field):
-        field = field.split(cls.LABEL_SEPARATOR)[0]
-        names = field.split(cls.FIELD_SEPARATOR)
-        name = names.pop(0)
-        try:
-            if len(names):
-                related_model = model._meta.get_field(name).related_model
-                if related_model:
-                    return cls.get_field(related_model, cls.FIELD_SEPARATOR.join(names))
-                else:
-                    raise ImproperlyConfigured(f"The field <{name}> not is an object")
-            field = model._meta.get_field(name)
-            return field
-        except FieldDoesNotExist:
-            str_model = (
-                model._meta.model_name if hasattr(model, "_meta") else str(model)
-            )
-            raise AttributeError(f"Does not exist attribute <{name}> for {str_model}")
+    def get_accessor(cls, model, field):
+        """Return the compiled accessor for ``field`` of a model or instance"""
+        if not isinstance(model, type):
+            model = model.__class__
+        return cls.compile(model, field)
 
     @classmethod
-    def get_field_label(cls, model, field):
+    @lru_cache(maxsize=settings.FIELD_ACCESSOR_CACHE_SIZE)
+    def compile(cls, model, field):
+        name = field.split(cls.LABEL_SEPARATOR)[0]
         try:
-            name, verbose_name = field.split(cls.LABEL_SEPARATOR)
-            return pretty_name(verbose_name)
+            _, verbose_name = field.split(cls.LABEL_SEPARATOR)
+            label = pretty_name(verbose_name)
         except ValueError:
-            pass
+            label = None
         if "__str__" in field:
-            label = str(model._meta.verbose_name)
-            return pretty_name(label)
-        names = field.split(cls.FIELD_SEPARATOR)
-        name = names.pop(0)
-        if not hasattr(model, name):
+            label = label or pretty_name(str(model._meta.verbose_name))
+            return FieldAccessor(model, name, label, "Function", FieldAccessor.STR)
+
+        names = name.split(cls.FIELD_SEPARATOR)
+        current = model
+        columnar = True
+        for index, attr in enumerate(names):
+            if not hasattr(current, attr):
+                str_model = (
+                    current._meta.model_name
+                    if hasattr(current, "_meta")
+                    else str(current)
+                )
+                raise AttributeError(
+                    f"Does not exist attribute <{attr}> for {str_model}."
+                )
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                path, rest = tuple(names[:index]), names[index:]
+                if len(rest) == 1:
+                    kind = FieldAccessor.ATTRIBUTE
+                else:
+                    kind = FieldAccessor.DYNAMIC
+                return FieldAccessor(
+                    model,
+                    name,
+                    label or pretty_name(names[-1]),
+                    "Function",
+                    kind,
+                    path=path,
+                    attr=cls.FIELD_SEPARATOR.join(rest),
+                )
+            if index < len(names) - 1:
+                columnar = (
+                    columnar
+                    and model_field.concrete
+                    and (model_field.many_to_one or model_field.one_to_one)
+                )
+                current = model_field.related_model
+
+        path = tuple(names[:-1])
+        verbose_name = getattr(model_field, "verbose_name", model_field.name)
+        label = label or pretty_name(verbose_name)
+        field_type = model_field.get_internal_type()
+        columnar = columnar and model_field.concrete and not model_field.is_relation
+        column = name if columnar else None
+        if getattr(model_field, "choices", None):
+            return FieldAccessor(
+                model,
+                name,
+                label,
+                field_type,
+                FieldAccessor.CHOICES,
+                field=model_field,
+                choices=dict(model_field.choices),
+                path=path,
+                attr=model_field.attname,
+                column=column,
+            )
+        if model_field.related_model:
+            kind, attr = FieldAccessor.RELATED, model_field.name
+        else:
+            kind, attr = FieldAccessor.VALUE, model_field.attname
+        return FieldAccessor(
+            model,
+            name,
+            label,
+            field_type,
+            kind,
+            field=model_field,
+            path=path,
+            attr=attr,
+            column=column,
+        )
+
+    @classmethod
+    def clear_cache(cls):
+        cls.compile.cache_clear()
+
+    @classmethod
+    def get_field(cls, model, field):
+        accessor = cls.get_accessor(model, field)
+        if accessor.field is None:
             str_model = (
                 model._meta.model_name if hasattr(model, "_meta") else str(model)
             )
-            raise AttributeError(f"Does not exist attribute <{name}> for {str_model}.")
-        try:
-            field = model._meta.get_field(name)
-            if len(names):
-                related_model = field.related_model
-                return cls.get_field_label(
-                    related_model, cls.FIELD_SEPARATOR.join(names)
-                )
-            label = field.verbose_name
-        except FieldDoesNotExist:
-            attr = getattr(object, name)
-            if len(names):
-                return cls.get_field_label(
-                    attr(model) if callable(attr) else attr,
-                    cls.FIELD_SEPARATOR.join(names),
-                )
-            label = name
-        return pretty_name(label)
+            raise AttributeError(
+                f"Does not exist attribute <{accessor.name}> for {str_model}"
+            )
+        return accessor.field
+
+    @classmethod
+    def get_field_label(cls, model, field):
+        return cls.get_accessor(model, field).label
 
     @classmethod
     def get_field_value(cls, object, field):
         if "__str__" in field:
             return object
+        if object is None:
+            return object
+        if not hasattr(object, "_meta"):
+            return cls.resolve_value(object, field)
+        return cls.get_accessor(object, field).get_value(object)
+
+    @classmethod
+    def get_attribute_value(cls, object, name):
+        attr = getattr(object, name)
+        attr = attr() if callable(attr) else attr
+        if isinstance(attr, bool):
+            attr = settings.BOOLEAN_YES if attr else settings.BOOLEAN_NO
+        return format_html(str(attr))
+
+    @classmethod
+    def resolve_value(cls, object, field):
+        """Walk ``field`` over any object, it is used when can not be compiled"""
         if object is None:
             return object
         field = field.split(cls.LABEL_SEPARATOR)[0]
@@ -88,57 +237,145 @@ class FieldService:
             return cls.get_field_value(
                 attr() if callable(attr) else attr, cls.FIELD_SEPARATOR.join(names)
             )
-        try:
-            field = object._meta.get_field(name)
-            if hasattr(field, "choices") and field.choices:
-                return dict(field.choices).get(field.value_from_object(object))
-            elif field.related_model:
-                if field.one_to_many or field.many_to_many:
-                    raise ImproperlyConfigured(
-                        "OneToMany or ManyToMany is not supported: '%s' " % field.name
-                    )
-                try:
-                    return field.related_model.objects.get(
-                        pk=field.value_from_object(object)
-                    )
-                except field.related_model.DoesNotExist:
-                    return None
-            else:
-                return field.value_from_object(object)
-        except FieldDoesNotExist:
-            attr = getattr(object, name)
-            attr = attr() if callable(attr) else attr
-            if isinstance(attr, bool):
-                attr = settings.BOOLEAN_YES if attr else settings.BOOLEAN_NO
-            return format_html(str(attr))
+        if not hasattr(object, "_meta"):
+            return cls.get_attribute_value(object, name)
+        return cls.get_accessor(object, name).get_value(object)
 
     @classmethod
     def get_field_type(cls, model, field):
-        field = field.split(cls.LABEL_SEPARATOR)[0]
-        names = field.split(cls.FIELD_SEPARATOR)
-        name = names.pop(0)
-        if not hasattr(model, name):
-            str_model = (
-                model._meta.model_name if hasattr(model, "_meta") else str(model)
+        return cls.get_accessor(model, field).type
+
+
+class QueryService:
+    """Compile field paths into the join plan of a queryset"""
+
+    @classmethod
+    def get_relation_path(cls, model, field):
+        """
+        Return (path, multiple) for the relations crossed by ``field``, where
+        ``multiple`` says if any of them is a reverse FK, M2M or generic FK.
+        """
+        field = field.split(FieldService.LABEL_SEPARATOR)[0]
+        relations = []
+        multiple = False
+        if "__str__" in field:
+            return relations, multiple
+        for name in field.split(FieldService.FIELD_SEPARATOR):
+            try:
+                field = model._meta.get_field(name)
+            except (FieldDoesNotExist, AttributeError):
+                break
+            if not field.is_relation:
+                break
+            relations.append(name)
+            if field.related_model is None:
+                # Generic foreign keys can only be prefetched
+                multiple = True
+                break
+            if field.one_to_many or field.many_to_many:
+                multiple = True
+            model = field.related_model
+        return relations, multiple
+
+    @classmethod
+    def get_join_plan(cls, model, fields):
+        """
+        Return the ``select_related`` and ``prefetch_related`` lookups needed
+        to render ``fields``. The filters and searches are not in the plan,
+        they join their tables only when they are applied.
+        """
+        select_related, prefetch_related = [], []
+        for field in fields:
+            relations, multiple = cls.get_relation_path(model, field)
+            if not relations:
+                continue
+            path = FieldService.FIELD_SEPARATOR.join(relations)
+            target = prefetch_related if multiple else select_related
+            if path not in target:
+                target.append(path)
+        return tuple(select_related), tuple(prefetch_related)
+
+    @classmethod
+    def get_plan_models(cls, model, plan):
+        """Related models read by the lookups of a join plan"""
+        models = []
+        for path in (*plan[0], *plan[1]):
+            current = model
+            for name in path.split(FieldService.FIELD_SEPARATOR):
+                current = current._meta.get_field(name).related_model
+                if current is None:
+                    break
+                if current not in models:
+                    models.append(current)
+        return models
+
+    @classmethod
+    def apply_join_plan(cls, queryset, plan):
+        select_related, prefetch_related = plan
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+class DetailPlan(NamedTuple):
+    """
+    Detail fields of a model site compiled once: the accessor of every field,
+    the layout of the fieldsets and the joins needed to read them.
+    """
+
+    accessors: tuple  # (field, FieldAccessor)
+    fieldsets: tuple  # (title, rows), every row is (bs_cols, fields)
+    join_plan: tuple  # (select_related, prefetch_related)
+
+    @classmethod
+    def compile(cls, model, detail_fields):
+        if isinstance(detail_fields, (list, tuple)):
+            fieldsets = [(None, detail_fields)]
+        elif isinstance(detail_fields, dict):
+            fieldsets = list(detail_fields.items())
+        else:
+            raise ImproperlyConfigured(
+                "The fieldsets must be an instance of list, tuple or dict"
             )
-            raise AttributeError(f"Does not exist attribute <{name}> for {str_model}.")
-        if len(names):
-            if hasattr(model, "_meta"):
-                return cls.get_field_type(
-                    model._meta.get_field(name).related_model,
-                    cls.FIELD_SEPARATOR.join(names),
-                )
-            else:
-                attr = getattr(model, name)
-                return cls.get_field_type(
-                    attr() if callable(attr) else attr, cls.FIELD_SEPARATOR.join(names)
-                )
-        try:
-            field = model._meta.get_field(name)
-            type = model._meta.get_field(name).get_internal_type()
-        except FieldDoesNotExist:
-            type = "Function"
-        return type
+
+        compiled, fields = [], []
+        for title, fieldset in fieldsets:
+            rows = []
+            for row in fieldset:
+                row = tuple(row) if isinstance(row, (list, tuple)) else (row,)
+                rows.append((int(12 / len(row)), row))
+                fields.extend(field for field in row if field not in fields)
+            compiled.append((title or "", tuple(rows)))
+        fields = fields or [field.name for field in model._meta.fields]
+
+        accessors = tuple(
+            (field, FieldService.get_accessor(model, field)) for field in fields
+        )
+        join_plan = QueryService.get_join_plan(model, fields)
+        return cls(accessors, tuple(compiled), join_plan)
+
+    def get_results(self, object):
+        """Return the (label, value, type, field) of every field and the fieldsets"""
+        results = {
+            field: (accessor.label, accessor.get_value(object), accessor.type, field)
+            for field, accessor in self.accessors
+        }
+        fieldsets = [
+            {
+                "title": title,
+                "fieldset": [
+                    {
+                        "bs_cols": bs_cols,
+                        "fields": [results.get(field, ("", "", "")) for field in row],
+                    }
+                    for bs_cols, row in rows
+                ],
+            }
+            for title, rows in self.fieldsets
+        ]
+        return results.values(), fieldsets
 
 
 class FilterService:
@@ -211,19 +448,64 @@ class FilterService:
         return choices
 
     @classmethod
-    def get_previous_and_next(cls, queryset, instance):
-        values = queryset.values_list("id", flat=True).all()
-        for index, value in enumerate(values):
-            if value == instance.pk:
-                previous_id = None if index == 0 else values[index - 1]
-                next_id = None if index == len(values) - 1 else values[index + 1]
-                objects = queryset.filter(id__in=[previous_id, next_id])
-                return {
-                    "previous": previous_id if not previous_id else objects.first(),
-                    "next": next_id if not next_id else objects.last(),
-                    "current_index": index,
-                    "total_entries": len(values),
-                }
+    def get_related_models(cls, model, fields):
+        """Related models of the relation filters, its changes alter the choices"""
+        models = []
+        for field in fields:
+            try:
+                related_model = FieldService.get_accessor(model, field).field
+            except AttributeError:
+                continue
+            related_model = getattr(related_model, "related_model", None)
+            if related_model and related_model not in models:
+                models.append(related_model)
+        return models
+
+    @classmethod
+    def get_search_fields(cls, related_model):
+        """Default fields of autocomplete, the first text field or the pk"""
+        for field in related_model._meta.concrete_fields:
+            if field.get_internal_type() in ("CharField", "SlugField", "EmailField"):
+                return (field.name,)
+        return ("pk",)
+
+    @classmethod
+    def get_choices_page(
+        cls, model, field, term="", page=1, page_size=50, search_fields=()
+    ):
+        """
+        Page of choices of a relation filter as (choices, more), it reads
+        only the pk and the search fields of the related model.
+        """
+        related_model = FieldService.get_field(model, field).related_model
+        search_fields = search_fields or cls.get_search_fields(related_model)
+        queryset = related_model._default_manager.all()
+        if term:
+            queryset = queryset.filter(
+                reduce(
+                    operator.__or__,
+                    (Q(**{f"{name}__icontains": term}) for name in search_fields),
+                )
+            )
+        start = (page - 1) * page_size
+        rows = list(
+            cls.get_choice_rows(queryset, search_fields)[start : start + page_size + 1]
+        )
+        choices = [cls.get_choice(row) for row in rows[:page_size]]
+        return choices, len(rows) > page_size
+
+    @classmethod
+    def get_choice_rows(cls, queryset, search_fields):
+        """Rows of the pk and the search fields, the objects are not loaded"""
+        return queryset.order_by(*search_fields, "pk").values_list("pk", *search_fields)
+
+    @classmethod
+    def get_choice(cls, row):
+        pk, *values = row
+        return {
+            "id": pk,
+            "text": " ".join(str(value) for value in values if value is not None),
+        }
 
     @classmethod
     def get_params(self, model, session):
@@ -283,8 +565,538 @@ class FilterService:
             return reduce(operator.__and__, args)
         return args
 
+    @classmethod
+    def get_search_terms(cls, search):
+        search = (search or "").replace("+", ",").replace(";", ",")
+        return [term.strip() for term in search.split(",") if term.strip()]
+
+    @classmethod
+    def search(cls, queryset, fields, search):
+        """
+        Filter the queryset by every term of search in any of the fields. All
+        terms go in a single Q so every relation is joined only once.
+        """
+        terms = cls.get_search_terms(search)
+        if not terms or not isinstance(fields, (list, tuple)) or not fields:
+            return queryset
+        query = reduce(
+            operator.__and__,
+            (
+                reduce(operator.__or__, (Q(**{field: term}) for field in fields))
+                for term in terms
+            ),
+        )
+        queryset = queryset.filter(query)
+        if any(
+            QueryService.get_relation_path(queryset.model, field)[1]
+            for field in fields
+        ):
+            queryset = queryset.distinct()
+        return queryset
+
     @classmethod
     def has_lookup(cls, key):
         for lookup in cls.get_flatten_lookups():
             if key.endswith(lookup):
                 return lookup
+
+
+class GenerationService:
+    """
+    Counters saved in the shared cache that change every time the data of a
+    model changes, cache keys that include them are invalidated on change.
+    """
+
+    KEY = "superadmin:generation:%s"
+    tracked = set()
+
+    @classmethod
+    def get_cache(cls):
+        return caches[settings.CACHE_ALIAS]
+
+    @classmethod
+    def get_name(cls, model):
+        if isinstance(model, str):
+            return model
+        return model._meta.concrete_model._meta.label_lower
+
+    @classmethod
+    def track(cls, model):
+        """Changes of tracked models bump its generation by signals"""
+        cls.tracked.add(cls.get_name(model))
+
+    @classmethod
+    def is_tracked(cls, model):
+        return cls.get_name(model) in cls.tracked
+
+    @classmethod
+    def get(cls, model):
+        cache = cls.get_cache()
+        key = cls.KEY % cls.get_name(model)
+        generation = cache.get(key)
+        if generation is None:
+            # Starts from time for not reuse old generations after an eviction
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            generation = cache.get(key, 0)
+        return generation
+
+    @classmethod
+    def bump(cls, model):
+        cache = cls.get_cache()
+        key = cls.KEY % cls.get_name(model)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            return cache.get(key, 0)
+
+
+class CountService:
+    """
+    Count querysets of a model site once by request. If the model site allows
+    it, counts are saved in the cache by model generation and normalized query,
+    and big unfiltered tables can be estimated from database statistics.
+    """
+
+    KEY = "superadmin:count:%s:%s:%s"
+
+    def __init__(self, site):
+        self.site = site
+        self.counts = {}
+        self.estimates = set()
+
+    @classmethod
+    def get_for_request(cls, request, site):
+        """Counter shared by all the code that handles the same request"""
+        if not hasattr(request, "superadmin_counters"):
+            request.superadmin_counters = {}
+        if site not in request.superadmin_counters:
+            request.superadmin_counters[site] = cls(site)
+        return request.superadmin_counters[site]
+
+    @classmethod
+    def get_query_hash(cls, queryset):
+        if not queryset.query.is_sliced:
+            queryset = queryset.order_by()
+        sql, params = queryset.query.sql_with_params()
+        return hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+
+    def count(self, queryset):
+        query_hash = self.get_query_hash(queryset)
+        if query_hash not in self.counts:
+            self.counts[query_hash] = self.get_count(queryset, query_hash)
+        return self.counts[query_hash]
+
+    def get_count(self, queryset, query_hash):
+        if self.site.count_estimate and self.is_unfiltered(queryset):
+            estimate = self.estimate(queryset)
+            if estimate is not None and estimate >= settings.COUNT_ESTIMATE_THRESHOLD:
+                self.estimates.add(query_hash)
+                return estimate
+        if not self.site.cache_counts:
+            return queryset.count()
+        cache = GenerationService.get_cache()
+        # The filters and searches join other tables, their changes alter the count
+        generations = ":".join(
+            str(GenerationService.get(model)) for model in self.site.count_models
+        )
+        key = self.KEY % (
+            GenerationService.get_name(queryset.model),
+            generations,
+            query_hash,
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.COUNT_CACHE_TIMEOUT)
+        return count
+
+    def is_estimate(self, queryset):
+        return self.get_query_hash(queryset) in self.estimates
+
+    @classmethod
+    def is_unfiltered(cls, queryset):
+        query = queryset.query
+        return not (
+            query.where or query.distinct or query.is_sliced or query.combinator
+        )
+
+    @classmethod
+    def estimate(cls, queryset):
+        """Rows of the model table by the statistics of the database"""
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        if connection.vendor == "postgresql":
+            sql = "SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)"
+        elif connection.vendor == "sqlite":
+            # Needs ANALYZE, the first number of stat is the rows of the table
+            sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s"
+        else:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [table])
+                row = cursor.fetchone()
+        except DatabaseError:
+            return None
+        if not row or row[0] is None:
+            return None
+        estimate = int(float(str(row[0]).split()[0]))
+        return estimate if estimate >= 0 else None
+
+
+class UrlService:
+    """
+    Urls of the actions of a model site. Every route is reversed once with a
+    placeholder and the urls of each object are built replacing its pk or slug.
+    """
+
+    SITE_ACTIONS = (
+        ("list", "view"),
+        ("create", "add"),
+        ("import", "add"),
+        ("export", "view"),
+        ("mass_update", "change"),
+        ("mass_delete", "delete"),
+    )
+    OBJECT_ACTIONS = (
+        ("update", "change"),
+        ("detail", "view"),
+        ("delete", "delete"),
+        ("duplicate", "add"),
+    )
+    PLACEHOLDERS = {"pk": "9876543210123456789", "slug": "superadmin-slug"}
+
+    def __init__(self, site):
+        self.site = site
+        self.resolver = None
+        self.routes = {}
+
+    def get_routes(self):
+        """Reversed routes by action, rebuilt only when the urlconf changes"""
+        resolver = get_resolver(get_urlconf())
+        if resolver is not self.resolver:
+            self.resolver = resolver
+            self.routes = {}
+        prefix = get_script_prefix()
+        if prefix not in self.routes:
+            self.routes[prefix] = self.build_routes()
+        return self.routes[prefix]
+
+    def build_routes(self):
+        routes = {}
+        has_slug = hasattr(self.site.model, self.site.slug_field)
+        param = "slug" if has_slug else "pk"
+        placeholder = self.PLACEHOLDERS[param]
+        for action, _ in self.SITE_ACTIONS:
+            url_name = self.site.get_url_name(action)
+            try:
+                routes[action] = reverse(url_name)
+            except NoReverseMatch:
+                if django_settings.DEBUG:
+                    print("DEBUG: Url not found: %s" % url_name)
+        for action, _ in self.OBJECT_ACTIONS:
+            url_name = self.site.get_url_name(action)
+            try:
+                url = reverse(url_name, kwargs={param: placeholder})
+            except NoReverseMatch:
+                if django_settings.DEBUG:
+                    print("DEBUG: Url not found: %s" % url_name)
+                continue
+            start, _, end = url.rpartition(placeholder)
+            routes[action] = (start, end)
+        return routes
+
+    def get_actions(self, user=None):
+        """Actions allowed to the user, all of them if there is no user"""
+        actions = self.SITE_ACTIONS + self.OBJECT_ACTIONS
+        if not user:
+            return {action for action, _ in actions}
+        app = self.site.model._meta.app_label
+        model = self.site.model._meta.model_name
+        snapshot = PermissionService.get(user)
+        perms = {
+            perm: snapshot.has_perm(f"{app}.{perm}_{model}")
+            for perm in {perm for _, perm in actions}
+        }
+        return {action for action, perm in actions if perms[perm]}
+
+    def get_urls(self, object=None, actions=None):
+        routes = self.get_routes()
+        actions = self.get_actions() if actions is None else actions
+        urls = {
+            action: routes[action]
+            for action, _ in self.SITE_ACTIONS
+            if action in actions and action in routes
+        }
+        if object is None:
+            return urls
+        slug_field = self.site.slug_field
+        value = getattr(object, slug_field if hasattr(object, slug_field) else "pk")
+        value = quote(str(value), safe="")
+        for action, _ in self.OBJECT_ACTIONS:
+            if action in actions and action in routes:
+                start, end = routes[action]
+                urls[action] = f"{start}{value}{end}"
+        return urls
+
+
+class NeighborService:
+    """
+    Previous and next objects of an instance inside a queryset, found with
+    seek queries over the ordering keys instead of loading every id.
+    """
+
+    @classmethod
+    def get_previous_and_next(
+        cls, queryset, instance, order_by=(), counter=None, position=True
+    ):
+        ordering = KeysetService.get_ordering(queryset, order_by)
+        values = KeysetService.get_keys(queryset.filter(pk=instance.pk), ordering)
+        values = values.first()
+        if values is None:
+            return None
+
+        queryset = queryset.order_by(*KeysetService.get_order_by(ordering))
+        before = queryset.filter(
+            KeysetService.get_seek_query(ordering, values, forward=False)
+        )
+        after = queryset.filter(
+            KeysetService.get_seek_query(ordering, values, forward=True)
+        )
+        nav = {
+            "previous": before.reverse().first(),
+            "next": after.first(),
+            "current_index": None,
+            "total_entries": None,
+        }
+        if position:
+            nav["current_index"] = before.count()
+            nav["total_entries"] = (
+                counter.count(queryset) if counter else queryset.count()
+            )
+        return nav
+
+
+class FacetService:
+    """
+    Count the rows of the filtered queryset by every value of the filter fields
+    with choices: booleans, choices and relations with few values. Each facet
+    is a GROUP BY, they run on a thread pool shared by the requests and are
+    cached by the normalized query and the generations of the models joined
+    by the searches and filters and the related models of the facets.
+    """
+
+    KEY = "superadmin:facets:%s:%s"
+    BOOLEAN_TYPES = ("BooleanField", "NullBooleanField")
+    RELATION_TYPES = ("ForeignKey", "OneToOneField")
+    executor = None
+
+    @classmethod
+    def get_accessors(cls, site):
+        accessors = []
+        for field in site.filter_fields:
+            try:
+                accessor = FieldService.get_accessor(site.model, field)
+            except AttributeError:
+                continue
+            if accessor.field is None or not accessor.field.concrete:
+                continue
+            if QueryService.get_relation_path(site.model, accessor.name)[1]:
+                continue
+            if (
+                accessor.choices
+                or accessor.type in cls.BOOLEAN_TYPES
+                or accessor.type in cls.RELATION_TYPES
+            ):
+                accessors.append(accessor)
+        return accessors
+
+    @classmethod
+    def get_executor(cls):
+        if cls.executor is None:
+            cls.executor = ThreadPoolExecutor(
+                max_workers=settings.FACET_WORKERS,
+                thread_name_prefix="superadmin-facet",
+            )
+        return cls.executor
+
+    @classmethod
+    def get_key(cls, site, queryset, accessors):
+        # The searches and filters join the count models, the labels come
+        # from the related models of the facets
+        models = list(site.count_models)
+        for accessor in accessors:
+            related_model = accessor.field.related_model
+            if related_model and related_model not in models:
+                models.append(related_model)
+        generations = ":".join(str(GenerationService.get(model)) for model in models)
+        return cls.KEY % (
+            site.model._meta.label_lower,
+            hashlib.md5(
+                f"{generations}|{CountService.get_query_hash(queryset)}".encode()
+            ).hexdigest(),
+        )
+
+    @classmethod
+    def get_facets(cls, site, queryset):
+        accessors = cls.get_accessors(site)
+        if not accessors:
+            return []
+        cache = caches[settings.CACHE_ALIAS]
+        key = cls.get_key(site, queryset, accessors)
+        facets = cache.get(key)
+        if facets is not None:
+            return facets
+
+        # Threads have its own connections, they can not see the open transaction
+        if (
+            settings.FACET_WORKERS > 1
+            and len(accessors) > 1
+            and not connections[queryset.db].in_atomic_block
+        ):
+            get_facet = partial(cls.get_facet_in_thread, site, queryset)
+            facets = list(cls.get_executor().map(get_facet, accessors))
+        else:
+            facets = [
+                cls.get_facet(site, queryset, accessor) for accessor in accessors
+            ]
+        facets = [facet for facet in facets if facet]
+        cache.set(key, facets, settings.FACET_CACHE_TIMEOUT)
+        return facets
+
+    @classmethod
+    def get_facet_in_thread(cls, site, queryset, accessor):
+        # The threads of the pool keep their connection between requests, it
+        # is only closed after an error so the next facet opens a new one
+        try:
+            return cls.get_facet(site, queryset, accessor)
+        except DatabaseError:
+            connections[queryset.db].close()
+            raise
+
+    @classmethod
+    def get_facet(cls, site, queryset, accessor):
+        """Return the facet or None if the field has more values than allowed"""
+        limit = site.facet_max_choices
+        rows = list(
+            queryset.order_by()
+            .values_list(accessor.name)
+            .annotate(total=Count("pk", distinct=True))
+            .order_by("-total")[: limit + 1]
+        )
+        if len(rows) > limit:
+            return None
+        labels = cls.get_labels(accessor, [value for value, _ in rows])
+        return {
+            "name": accessor.name,
+            "label": accessor.label,
+            "choices": [
+                {"value": value, "label": labels.get(value, value), "count": total}
+                for value, total in rows
+            ],
+        }
+
+    @classmethod
+    def get_labels(cls, accessor, values):
+        if accessor.choices:
+            return accessor.choices
+        if accessor.type in cls.BOOLEAN_TYPES:
+            return {True: settings.BOOLEAN_YES, False: settings.BOOLEAN_NO}
+        related_model = accessor.field.related_model
+        objects = related_model._default_manager.filter(
+            pk__in=[value for value in values if value is not None]
+        )
+        return {object.pk: str(object) for object in objects}
+
+
+class PermissionSnapshot:
+    """
+    Permissions of a user loaded once, it answers ``has_perm`` like the user
+    without going through the auth backends on every check.
+    """
+
+    SUPERUSER = "superuser"
+
+    def __init__(self, user, permissions):
+        self.is_active = bool(user.is_active)
+        self.is_superuser = bool(self.is_active and user.is_superuser)
+        self.permissions = frozenset(permissions) if self.is_active else frozenset()
+
+    @cached_property
+    def fingerprint(self):
+        if self.is_superuser:
+            return self.SUPERUSER
+        return hashlib.md5("\n".join(sorted(self.permissions)).encode()).hexdigest()
+
+    def has_perm(self, perm):
+        return self.is_superuser or perm in self.permissions
+
+    def has_perms(self, perms):
+        return all(self.has_perm(perm) for perm in perms)
+
+    def has_any_perms(self, perms):
+        return any(self.has_perm(perm) for perm in perms)
+
+
+class PermissionService:
+    """
+    Snapshot of the permissions of the user, cached on the user object so
+    every check of the request shares it. With ModelBackend it is loaded with
+    one query, and with PERMISSION_CACHE_TIMEOUT it is saved in the cache until
+    a permission, group or membership changes.
+    """
+
+    KEY = "superadmin:permissions:%s:%s"
+    GENERATION = "superadmin.permissions"
+    ATTR = "_superadmin_permissions"
+
+    @classmethod
+    def get(cls, user):
+        snapshot = getattr(user, cls.ATTR, None)
+        if snapshot is None:
+            snapshot = PermissionSnapshot(user, cls.get_permissions(user))
+            setattr(user, cls.ATTR, snapshot)
+        return snapshot
+
+    @classmethod
+    def get_permissions(cls, user):
+        if not user.is_active or user.is_anonymous or user.is_superuser:
+            return ()
+        timeout = settings.PERMISSION_CACHE_TIMEOUT
+        if timeout is None:
+            return cls.load(user)
+        cache = caches[settings.CACHE_ALIAS]
+        key = cls.KEY % (user.pk, GenerationService.get(cls.GENERATION))
+        permissions = cache.get(key)
+        if permissions is None:
+            permissions = cls.load(user)
+            cache.set(key, permissions, timeout)
+        return permissions
+
+    @classmethod
+    def load(cls, user):
+        from django.contrib.auth import get_backends
+        from django.contrib.auth.backends import (
+            AllowAllUsersModelBackend,
+            ModelBackend,
+        )
+        from django.contrib.auth.models import Permission
+
+        if not all(
+            type(backend) in (ModelBackend, AllowAllUsersModelBackend)
+            for backend in get_backends()
+        ):
+            return frozenset(user.get_all_permissions())
+        permissions = (
+            Permission.objects.filter(Q(user=user) | Q(group__user=user))
+            .values_list("content_type__app_label", "codename")
+            .distinct()
+        )
+        return frozenset(
+            f"{app_label}.{codename}" for app_label, codename in permissions
+        )
+
+    @classmethod
+    def bump(cls):
+        return GenerationService.bump(cls.GENERATION)
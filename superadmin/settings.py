@@ -10,3 +10,52 @@ BOOLEAN_YES = getattr(settings, "BOOLEAN_YES", "Yes")
 BOOLEAN_NO = getattr(settings, "BOOLEAN_NO", "No")
 
 TEMPLATE_WIDGETS = getattr(settings, "TEMPLATE_WIDGETS", {})
+
+FIELD_ACCESSOR_CACHE_SIZE = getattr(settings, "FIELD_ACCESSOR_CACHE_SIZE", 1024)
+
+CACHE_ALIAS = getattr(settings, "CACHE_ALIAS", "default")
+COUNT_CACHE_TIMEOUT = getattr(settings, "COUNT_CACHE_TIMEOUT", 300)
+COUNT_ESTIMATE_THRESHOLD = getattr(settings, "COUNT_ESTIMATE_THRESHOLD", 100000)
+
+SEARCH_BACKEND = getattr(
+    settings, "SEARCH_BACKEND", "superadmin.search.ORMSearchBackend"
+)
+
+MENU_CACHE_TIMEOUT = getattr(settings, "MENU_CACHE_TIMEOUT", 3600)
+# None builds the urls once when the urlconf is imported
+URLS_RELOAD_INTERVAL = getattr(settings, "URLS_RELOAD_INTERVAL", 5)
+# Path of the routes manifest written by the routemanifest command, it is used
+# while the menu generation of CACHE_ALIAS is the one it was written with, so
+# CACHE_ALIAS must be shared by the processes: not the local memory cache
+URLS_MANIFEST = getattr(settings, "URLS_MANIFEST", None)
+
+FILTER_PAGE_SIZE = getattr(settings, "FILTER_PAGE_SIZE", 50)
+FILTER_CACHE_TIMEOUT = getattr(settings, "FILTER_CACHE_TIMEOUT", 300)
+
+# Threads shared by the requests, so the facets use at most as many connections
+FACET_WORKERS = getattr(settings, "FACET_WORKERS", 4)
+FACET_CACHE_TIMEOUT = getattr(settings, "FACET_CACHE_TIMEOUT", 300)
+
+BATCH_CHUNK_SIZE = getattr(settings, "BATCH_CHUNK_SIZE", 500)
+# The progress of the background actions is saved in CACHE_ALIAS, without a
+# cache shared by the processes they run in the request
+BATCH_BACKGROUND_THRESHOLD = getattr(settings, "BATCH_BACKGROUND_THRESHOLD", 5000)
+BATCH_WORKERS = getattr(settings, "BATCH_WORKERS", 2)
+BATCH_CACHE_TIMEOUT = getattr(settings, "BATCH_CACHE_TIMEOUT", 3600)
+
+IMPORT_BATCH_SIZE = getattr(settings, "IMPORT_BATCH_SIZE", 1000)
+# Processes forked to validate the rows, 0 validates them in the request: a
+# fork of a threaded server copies the locks held by the other threads
+IMPORT_WORKERS = getattr(settings, "IMPORT_WORKERS", 0)
+IMPORT_MAX_ERRORS = getattr(settings, "IMPORT_MAX_ERRORS", 1000)
+
+PERMISSION_CACHE_TIMEOUT = getattr(settings, "PERMISSION_CACHE_TIMEOUT", None)
+
+INSTRUMENTATION = getattr(settings, "INSTRUMENTATION", False)
+INSTRUMENTATION_SINKS = getattr(
+    settings, "INSTRUMENTATION_SINKS", ["superadmin.instrumentation.LoggingSink"]
+)
+INSTRUMENTATION_BUFFER_SIZE = getattr(settings, "INSTRUMENTATION_BUFFER_SIZE", 1000)
+STATSD_HOST = getattr(settings, "STATSD_HOST", "127.0.0.1")
+STATSD_PORT = getattr(settings, "STATSD_PORT", 8125)
+STATSD_PREFIX = getattr(settings, "STATSD_PREFIX", "superadmin")
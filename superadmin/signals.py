@@ -2,19 +2,142 @@
 
 # Django
 from django.core.exceptions import ImproperlyConfigured
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    class_prepared,
+    m2m_changed,
+)
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import CharField, Exists, OuterRef, Value
+from django.db.models.functions import Concat, Substr
 from django.dispatch import receiver
 from django.utils.text import slugify
 from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 
 # Models
-from .models import Menu
+from .models import Action, Menu
 
 # Local
-from .services import FieldService
+from .search import IndexedSearchBackend
+from .services import FieldService, GenerationService, PermissionService
+from .utils import clear_import_cache
 from . import site
 
 
+""" Signals for clear compiled fields and imported classes when the apps reload """
+
+
+@receiver(class_prepared)
+def clear_field_accessors(sender, **kwargs):
+    FieldService.clear_cache()
+
+
+@receiver(setting_changed)
+def clear_caches_on_apps_changed(sender, setting, **kwargs):
+    if setting == "INSTALLED_APPS":
+        FieldService.clear_cache()
+        clear_import_cache()
+
+
+""" Signals for invalidate cached data of tracked models """
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_generation(sender, **kwargs):
+    if GenerationService.is_tracked(sender):
+        GenerationService.bump(sender)
+
+
+""" Signals for invalidate the cached menu trees """
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_menu_generation(sender, **kwargs):
+    if sender in (Menu, Action, Permission):
+        GenerationService.bump(Menu)
+
+
+@receiver(m2m_changed, sender=Action.permissions.through)
+def bump_menu_generation_on_permissions(sender, **kwargs):
+    GenerationService.bump(Menu)
+
+
+""" Signals for invalidate the cached permissions of the users """
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def bump_permissions_generation(sender, **kwargs):
+    PermissionService.bump()
+
+
+# Custom user models may not have groups or permissions
+for relation in ("groups", "user_permissions"):
+    if hasattr(get_user_model(), relation):
+        m2m_changed.connect(
+            bump_permissions_generation,
+            sender=getattr(get_user_model(), relation).through,
+        )
+
+
+""" Signals for keep updated the search indexes """
+
+
+@receiver(pre_save)
+def find_moved_search_documents(sender, instance, raw=False, **kwargs):
+    """Indexed objects that reach the instance by a relation that it can change"""
+    if raw or instance._state.adding:
+        return
+    instance._search_documents = {
+        (backend, lookup): backend.get_related(lookup, instance)
+        for backend, lookup in IndexedSearchBackend.get_dependents(sender)
+        if lookup in backend.moving
+    }
+
+
+@receiver(pre_delete)
+def find_deleted_search_documents(sender, instance, **kwargs):
+    """Indexed objects that reach the instance, after the delete they do not"""
+    instance._search_documents = {
+        (backend, lookup): backend.get_related(lookup, instance)
+        for backend, lookup in IndexedSearchBackend.get_dependents(sender)
+        if lookup is not None
+    }
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, **kwargs):
+    previous = getattr(instance, "_search_documents", {})
+    for backend, lookup in IndexedSearchBackend.get_dependents(sender):
+        if lookup is None:
+            backend.update([instance])
+        else:
+            backend.update_related(
+                lookup, instance, previous.get((backend, lookup), ())
+            )
+
+
+@receiver(post_delete)
+def delete_search_index(sender, instance, **kwargs):
+    previous = getattr(instance, "_search_documents", {})
+    for backend, lookup in IndexedSearchBackend.get_dependents(sender):
+        if lookup is None:
+            backend.delete([instance])
+        else:
+            backend.update_on_commit(previous.get((backend, lookup), ()))
+
+
 """ Signal for presave instance """
 
 
@@ -51,29 +174,50 @@ def prepopulate_slug(sender, instance, **kwargs):
 
 
 @receiver(pre_save, sender=Menu)
-def add_route(sender, instance, **kwargs):
+def add_route(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None
+    if instance.pk:
+        previous = (
+            Menu.objects.filter(pk=instance.pk)
+            .annotate(has_submenus=Exists(Menu.objects.filter(parent=OuterRef("pk"))))
+            .values_list("route", "parent_id", "has_submenus")
+            .first()
+        )
     instance.route = instance.get_route()
+    instance.is_group = bool(previous and previous[2])
+    instance._previous_tree = previous[:2] if previous else (None, None)
 
 
 @receiver(post_save, sender=Menu)
-def check(sender, instance, **kwargs):
-
-    post_save.disconnect(check, sender=Menu)
-    pre_save.disconnect(add_route, sender=Menu)
+def check(sender, instance, raw=False, **kwargs):
+    """Rewrite the routes of the subtree and the groups of the changed parents"""
+    if raw:
+        return
+    route, parent = getattr(instance, "_previous_tree", (None, None))
+    with transaction.atomic():
+        if route and route != instance.route:
+            prefix = f"{route}/"
+            Menu.objects.filter(route__startswith=prefix).update(
+                route=Concat(
+                    Value(f"{instance.route}/"),
+                    Substr("route", len(prefix) + 1),
+                    output_field=CharField(),
+                )
+            )
+        parents = {parent, instance.parent_id} - {None}
+        if parents:
+            update_groups(parents)
 
-    def update_route(menu):
-        menu.route = menu.get_route()
-        menu.save()
-        for submenu in menu.submenus.all():
-            update_route(submenu)
 
-    def update_groups():
-        for menu in Menu.objects.all():
-            menu.is_group = bool(menu.submenus.count())
-            menu.save()
+@receiver(post_delete, sender=Menu)
+def check_parent(sender, instance, **kwargs):
+    if instance.parent_id:
+        update_groups([instance.parent_id])
 
-    update_route(instance)
-    update_groups()
 
-    post_save.connect(check, sender=Menu)
-    pre_save.connect(add_route, sender=Menu)
+def update_groups(pks):
+    Menu.objects.filter(pk__in=pks).update(
+        is_group=Exists(Menu.objects.filter(parent=OuterRef("pk")))
+    )
@@ -1,7 +1,7 @@
 """Classes and functios for register site models"""
 
 # Django
-from superadmin.services import FieldService
+from superadmin.services import FilterService, GenerationService
 from django.conf import settings
 from django.utils.text import slugify
 from django.core.exceptions import ImproperlyConfigured
@@ -11,8 +11,11 @@ from django.urls import path, include
 from django.apps import apps
 
 # Local
-from .views import FilterView, SessionView
+from .manifest import load as load_manifest
+from .resolvers import SiteResolver
+from .views import FilterView, SessionView, StatsView
 from .utils import import_mixin
+from . import settings as superadmin_settings
 
 
 class Site:
@@ -21,6 +24,7 @@ class Site:
     def __init__(self, name="site"):
         self._registry = {}
         self.name = name
+        self.url_resolver = None
 
     def register(self, model, site_class):
         """Registra las clases en el auto site"""
@@ -45,6 +49,18 @@ class Site:
             raise Exception("The model %s is already registered" % model.__name__)
 
         self._registry[model] = site_class(model)
+        self._registry[model].search_engine.connect()
+        GenerationService.track(model)
+        for related_model in FilterService.get_related_models(
+            model, self._registry[model].filter_fields
+        ):
+            GenerationService.track(related_model)
+        if self._registry[model].conditional_requests:
+            for related_model in self._registry[model].conditional_models:
+                GenerationService.track(related_model)
+        if self._registry[model].cache_counts:
+            for related_model in self._registry[model].count_models:
+                GenerationService.track(related_model)
 
     def is_registered(self, model):
         """
@@ -99,18 +115,27 @@ class Site:
 
         return urlpatterns
 
-    def get_menus(self):
+    def get_menus(self, manifest=True):
+        """Menus of the urls, from the manifest of routes when there is one"""
+        if manifest and superadmin_settings.URLS_MANIFEST:
+            # It is only used while the menus are those of the generation it has
+            generation = GenerationService.get("superadmin.menu")
+            menus = load_manifest(superadmin_settings.URLS_MANIFEST, generation)
+            if menus is not None:
+                return menus
         menus = []
         try:
             Menu = apps.get_model("superadmin", "Menu")
             if Menu._meta.db_table in connection.introspection.table_names():
-                menus = Menu.objects.select_related("action").all()
+                menus = Menu.objects.select_related("action").prefetch_related(
+                    "action__permissions"
+                )
         except LookupError as error:
             if settings.DEBUG:
                 print(error)
         return menus
 
-    def get_urls(self):
+    def get_urls(self, manifest=True):
         """Obtiene las urls de auto site"""
 
         # def wrap(view, cacheable=False):
@@ -121,7 +146,7 @@ class Site:
 
         urlpatterns = []
         sites_in_menu = []
-        menus = self.get_menus()
+        menus = self.get_menus(manifest)
         for menu in menus:
             urlpatterns += self.get_menu_urls(menu)
             if self.is_registered(menu.action.model):
@@ -143,12 +168,27 @@ class Site:
                 name="session",
             ),
         ]
+        if superadmin_settings.INSTRUMENTATION:
+            urlpatterns += [
+                path(route="stats/", view=StatsView.as_view(), name="stats"),
+            ]
         return urlpatterns
 
     @property
     def urls(self):
         """Permite registrar las URLs en el archivo de urls del proyecto"""
-        return self.get_urls(), "site", self.name
+        if superadmin_settings.URLS_RELOAD_INTERVAL is None:
+            return self.get_urls(), "site", self.name
+        # The namespace is given by the resolver, it rebuilds the urls when
+        # the menus change
+        if self.url_resolver is None:
+            self.url_resolver = SiteResolver(self)
+        return [self.url_resolver], None, None
+
+    def refresh_urls(self, version):
+        """Make the urls of the menu generation ``version`` the current ones"""
+        if self.url_resolver is not None:
+            self.url_resolver.refresh(version)
 
 
 site = Site()
@@ -9,6 +9,7 @@ from django.urls import NoReverseMatch
 
 # Local
 from .. import site
+from ..services import PermissionService
 from ..shortcuts import get_urls_of_site
 
 register = template.Library()
@@ -49,7 +50,7 @@ def site_url(instance, action):
 
 @register.filter("has_perm")
 def has_perm(user, perm):
-    return user.has_perm(perm)
+    return PermissionService.get(user).has_perm(perm)
 
 
 @register.simple_tag()
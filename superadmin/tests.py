@@ -1,3 +1,1133 @@
-from django.test import TestCase
+""" Tests of superadmin, run them with ``manage.py test superadmin`` """
 
-# Create your tests here.
+# Python
+import datetime
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import time
+from unittest import mock
+
+# Django
+from django.contrib.auth.models import AnonymousUser, Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.test import (
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, path, reverse
+from django.utils import timezone
+
+# Local
+from .batches import BatchService
+from .importers import CSVImporter, get_existing
+from .instrumentation import (
+    Measure,
+    RingBufferSink,
+    Sink,
+    StatsDSink,
+    emit,
+    get_sinks,
+)
+from .manifest import load, write
+from .menus import MenuService
+from .models import Action, Menu
+from .options import ModelSite
+from .paginators import CursorPaginator, InvalidCursor, KeysetService
+from .search import IndexedSearchBackend
+from .services import (
+    CountService,
+    DetailPlan,
+    FacetService,
+    NeighborService,
+    PermissionService,
+    PermissionSnapshot,
+    QueryService,
+)
+from .sites import Site
+from .views import FilterView, ImportView, ListView, StatsView
+from . import settings
+
+
+class UserSite(ModelSite):
+    list_fields = ("username",)
+    order_by = ("-date_joined",)
+    paginate_by = 5
+    cursor_pagination = True
+
+
+class GroupSite(ModelSite):
+    list_fields = ("name",)
+    detail_fields = ("name",)
+    fields = ("name",)
+    search_params = ("permissions__codename__icontains",)
+    queryset = Group.objects.order_by("name")
+    paginate_by = 5
+    cache_counts = True
+    conditional_requests = True
+
+
+site = Site()
+site.register(User, UserSite)
+site.register(Group, GroupSite)
+
+urlpatterns = [path("", site.urls)]
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+            "loaders": [
+                (
+                    "django.template.loaders.locmem.Loader",
+                    {
+                        "auth/user_list.html": (
+                            "{% for row in site.rows %}{{ row.values.0 }},{% endfor %}"
+                            "|{% if page_obj.has_next %}"
+                            "{{ page_obj.next_page_number }}{% endif %}"
+                        ),
+                        "auth/group_list.html": (
+                            "{% for row in site.rows %}{{ row.values.0 }},{% endfor %}"
+                            "|{{ site.total_records }}"
+                        ),
+                        "auth/group_detail.html": "{{ object.name }}",
+                    },
+                )
+            ],
+        },
+    }
+]
+
+
+@override_settings(ROOT_URLCONF="superadmin.tests", TEMPLATES=TEMPLATES)
+class SiteTestCase(TestCase):
+    """Requests to the model sites of this module with a superuser"""
+
+    def setUp(self):
+        caches[settings.CACHE_ALIAS].clear()
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(self.user)
+
+
+def walk(paginator, limit=50):
+    """Pks of every page following the next cursors, and back with the previous"""
+    page = paginator.page()
+    forward = [object.pk for object in page.object_list]
+    for _ in range(limit):
+        if not page.has_next():
+            break
+        page = paginator.page(page.next_page_number())
+        forward += [object.pk for object in page.object_list]
+    backward = []
+    for _ in range(limit):
+        if not page.has_previous():
+            break
+        page = paginator.page(page.previous_page_number())
+        backward = [object.pk for object in page.object_list] + backward
+    return forward, backward
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        start = timezone.now().replace(microsecond=0)
+        for index in range(30):
+            # Every row in the same millisecond, they only differ by microseconds
+            User.objects.create(
+                username=f"user{index:02d}",
+                date_joined=start + datetime.timedelta(microseconds=(index * 7) % 30),
+                last_login=None if index % 3 else start,
+            )
+
+    def assertWalks(self, order_by):
+        queryset = User.objects.all()
+        paginator = CursorPaginator(queryset, 7, order_by=order_by)
+        expected = list(paginator.queryset.values_list("pk", flat=True))
+        forward, backward = walk(paginator)
+        self.assertEqual(forward, expected)
+        self.assertEqual(backward, expected[: len(backward)])
+        self.assertEqual(len(set(forward)), 30)
+
+    def test_datetime_keys_keep_microseconds(self):
+        self.assertWalks(("date_joined",))
+        self.assertWalks(("-date_joined",))
+
+    def test_primary_key_before_other_keys(self):
+        self.assertWalks(("pk", "username"))
+        self.assertWalks(("-id", "date_joined"))
+
+    def test_null_keys(self):
+        self.assertWalks(("last_login",))
+        self.assertWalks(("-last_login",))
+        self.assertWalks(("last_login", "-username"))
+
+    def test_nullable_relation_key(self):
+        action = Action.objects.create(
+            to=Action.ToChoices.MODEL, app_label="auth", element="user", name="Users"
+        )
+        parents = [
+            Menu.objects.create(name=f"Module {index}", action=action, sequence=index)
+            for index in range(3)
+        ]
+        for index in range(12):
+            Menu.objects.create(
+                name=f"Item {index}",
+                action=action,
+                parent=parents[index % 3] if index % 2 else None,
+                sequence=index,
+            )
+        for order_by in (("parent",), ("-parent",), ("parent__name", "sequence")):
+            paginator = CursorPaginator(Menu.objects.all(), 4, order_by=order_by)
+            expected = list(paginator.queryset.values_list("pk", flat=True))
+            forward, backward = walk(paginator)
+            self.assertEqual(forward, expected)
+            self.assertEqual(backward, expected[: len(backward)])
+
+    def test_cursor_values_round_trip(self):
+        paginator = CursorPaginator(User.objects.all(), 7, order_by=("date_joined",))
+        user = User.objects.order_by("date_joined").last()
+        values = (user.date_joined, user.pk)
+        cursor = paginator.encode_cursor(paginator.NEXT, values)
+        self.assertEqual(
+            paginator.decode_cursor(cursor), (paginator.NEXT, list(values))
+        )
+        self.assertEqual(
+            KeysetService.decode_value(KeysetService.encode_value(None)), None
+        )
+
+    def test_invalid_cursor(self):
+        paginator = CursorPaginator(User.objects.all(), 7, order_by=("date_joined",))
+        cursor = paginator.encode_cursor(paginator.NEXT, ["not a date", 1])
+        for value in (cursor, "garbage", "eyJkIjoibiJ9"):
+            with self.assertRaises(InvalidCursor):
+                paginator.page(value)
+
+
+class CursorListTests(SiteTestCase):
+    def test_pages_without_count(self):
+        for index in range(12):
+            User.objects.create(username=f"user{index:02d}")
+        url = reverse(site.get_modelsite(User).get_url_name("list"))
+        usernames, cursor = [], None
+        for _ in range(10):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, {"page": cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                [
+                    query
+                    for query in context.captured_queries
+                    if "COUNT(" in query["sql"]
+                ]
+            )
+            rows, cursor = response.content.decode().split("|")
+            usernames += rows.strip(",").split(",")
+            if not cursor:
+                break
+        self.assertEqual(len(usernames), 13)
+        self.assertEqual(len(set(usernames)), 13)
+
+
+class SiteUrlsTests(TestCase):
+    def get_names(self, model_site):
+        return {pattern.name for pattern in model_site.get_urls()}
+
+    def test_export_with_the_list(self):
+        self.assertIn("auth_group_export", self.get_names(GroupSite(Group)))
+        model_site = GroupSite(Group)
+        model_site.allow_views = ("detail", "update")
+        names = self.get_names(model_site)
+        self.assertNotIn("auth_group_export", names)
+        self.assertIn("auth_group_detail", names)
+
+
+class MenuUrlsTests(SiteTestCase):
+    @mock.patch.object(settings, "URLS_RELOAD_INTERVAL", 3600)
+    def test_graph_uses_the_urls_of_its_generation(self):
+        reverse("site:filter", args=("auth", "group", "name"))
+        action = Action.objects.create(
+            to=Action.ToChoices.CLASSVIEW,
+            app_label="superadmin",
+            element="ModuleView",
+            name="Module",
+        )
+        menu = Menu.objects.create(name="Reports", action=action, sequence=1)
+        # The next check of the resolver is an hour away
+        with self.assertRaises(NoReverseMatch):
+            reverse("site:reports")
+        with mock.patch("superadmin.sites.site", site):
+            graph = MenuService.get_graph(MenuService.get_generation())
+        self.assertEqual(reverse("site:reports"), f"/{menu.route}/")
+        self.assertEqual(graph.nodes[menu.pk].url, f"/{menu.route}")
+
+
+class MenuTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("superadmin.sites.site", site)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        module = Action.objects.create(
+            to=Action.ToChoices.CLASSVIEW,
+            app_label="superadmin",
+            element="ModuleView",
+            name="Module",
+        )
+        groups, users = [
+            Action.objects.create(
+                to=Action.ToChoices.MODEL, app_label="auth", element=element, name=name
+            )
+            for element, name in (("group", "Groups"), ("user", "Users"))
+        ]
+        self.security = Menu.objects.create(name="Security", action=module, sequence=1)
+        self.audit = Menu.objects.create(name="Audit", action=module, sequence=2)
+        self.groups = Menu.objects.create(
+            name="Groups", action=groups, parent=self.security, sequence=3
+        )
+        self.users = Menu.objects.create(
+            name="Users", action=users, parent=self.security, sequence=4
+        )
+
+    def get_user(self, username, *codenames):
+        user = User.objects.create_user(username)
+        user.user_permissions.set(Permission.objects.filter(codename__in=codenames))
+        return User.objects.get(pk=user.pk)
+
+    def get_names(self, menus):
+        return [(menu["name"], self.get_names(menu["submenus"])) for menu in menus]
+
+    def refresh(self, *menus):
+        return [Menu.objects.get(pk=menu.pk) for menu in menus]
+
+    def test_tree_cached_by_permissions(self):
+        ann = self.get_user("ann", "view_group")
+        bob = self.get_user("bob", "view_group")
+        cid = self.get_user("cid", "change_user")
+        with mock.patch.object(
+            MenuService, "get_graph", wraps=MenuService.get_graph
+        ) as get_graph:
+            tree = MenuService.get_user_menu(ann)
+            self.assertEqual(MenuService.get_user_menu(bob), tree)
+            self.assertEqual(get_graph.call_count, 1)
+            self.assertEqual(
+                self.get_names(MenuService.get_user_menu(cid)),
+                [("Security", [("Users", [])]), ("Audit", [])],
+            )
+            self.assertEqual(get_graph.call_count, 2)
+        # The module without submenus is shown, the empty groups are not
+        self.assertEqual(
+            self.get_names(tree), [("Security", [("Groups", [])]), ("Audit", [])]
+        )
+        self.assertEqual(
+            MenuService.get_user_menu(ann, parent=self.security.pk), tree[0]["submenus"]
+        )
+        self.groups.delete()
+        self.assertEqual(
+            self.get_names(MenuService.get_user_menu(bob)), [("Audit", [])]
+        )
+
+    def test_routes_after_a_rename(self):
+        self.security.name = "Admin"
+        self.security.save()
+        security, groups, users = self.refresh(self.security, self.groups, self.users)
+        self.assertEqual(
+            [security.route, groups.route, users.route],
+            ["admin", "admin/groups", "admin/users"],
+        )
+
+    def test_groups_after_a_move(self):
+        self.assertEqual(self.refresh(self.security)[0].is_group, True)
+        for menu in (self.groups, self.users):
+            menu.parent = self.audit
+            menu.save()
+        security, audit, groups = self.refresh(self.security, self.audit, self.groups)
+        self.assertEqual((security.is_group, audit.is_group), (False, True))
+        self.assertEqual(groups.route, "audit/groups")
+        groups.delete()
+        self.users.delete()
+        self.assertFalse(self.refresh(self.audit)[0].is_group)
+
+    def test_breadcrumbs_of_the_longest_route(self):
+        graph = MenuService.load()
+        node = graph.find_route("security/groups/12/update")
+        self.assertEqual(node.id, self.groups.pk)
+        self.assertEqual(
+            node.breadcrumbs,
+            (("Security", "/security/"), ("Groups", "/security/groups/")),
+        )
+        self.assertEqual(graph.find_route("security/other").id, self.security.pk)
+        self.assertIsNone(graph.find_route("securityx/groups"))
+        self.assertEqual(
+            MenuService.get_menu_in_path("audit/1/detail").id, self.audit.pk
+        )
+
+
+class ManifestTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # The generation is compared between processes in a shared cache
+        cache = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": directory,
+        }
+        shared = override_settings(CACHES={settings.CACHE_ALIAS: cache})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        module = Action.objects.create(
+            to=Action.ToChoices.CLASSVIEW,
+            app_label="superadmin",
+            element="ModuleView",
+            name="Module",
+        )
+        groups = Action.objects.create(
+            to=Action.ToChoices.MODEL, app_label="auth", element="group", name="Groups"
+        )
+        groups.permissions.add(Permission.objects.get(codename="view_group"))
+        parent = Menu.objects.create(
+            name="Security", action=module, icon_class="lock", sequence=1
+        )
+        Menu.objects.create(name="Groups", action=groups, parent=parent, sequence=2)
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+
+    def test_menus_as_in_the_database(self):
+        write(site, self.path)
+        menus = load(self.path, MenuService.get_generation())
+        expected = Menu.objects.select_related("action").order_by("sequence")
+        fields = ("pk", "name", "route", "parent_id", "icon_class", "is_group")
+        self.assertEqual(
+            [[getattr(menu, name) for name in fields] for menu in menus],
+            [[getattr(menu, name) for name in fields] for menu in expected],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(menus[1].action.get_permissions(), ["auth.view_group"])
+            self.assertEqual(menus[1].parent_id, menus[0].pk)
+
+    def test_local_cache_reads_the_database(self):
+        write(site, self.path)
+        generation = MenuService.get_generation()
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(CACHES={settings.CACHE_ALIAS: local}):
+            with self.assertWarns(RuntimeWarning):
+                self.assertIsNone(load(self.path, generation))
+
+    def test_other_generation_reads_the_database(self):
+        write(site, self.path)
+        Menu.objects.filter(name="Groups").update(name="Teams")
+        MenuService.bump()
+        self.assertIsNone(load(self.path, MenuService.get_generation()))
+        with mock.patch.object(settings, "URLS_MANIFEST", self.path):
+            menus = site.get_menus()
+        self.assertIn("Teams", [menu.name for menu in menus])
+
+
+class JoinPlanTests(TestCase):
+    def test_relations_of_the_fields(self):
+        plan = QueryService.get_join_plan(
+            Permission,
+            ("name", "content_type__app_label", "content_type:Type", "group__name"),
+        )
+        self.assertEqual(plan, (("content_type",), ("group",)))
+        self.assertEqual(
+            QueryService.get_plan_models(Permission, plan), [ContentType, Group]
+        )
+
+    def test_filters_and_searches_are_not_joined(self):
+        model_site = site.get_modelsite(Group)
+        self.assertEqual(model_site.list_join_plan, ((), ()))
+        queryset = QueryService.apply_join_plan(
+            model_site.queryset, model_site.list_join_plan
+        )
+        self.assertNotIn("JOIN", str(queryset.query))
+        # A change of the searched permissions still changes the list
+        self.assertEqual(model_site.conditional_models, [Group, Permission])
+
+
+class DetailPlanTests(TestCase):
+    def setUp(self):
+        action = Action.objects.create(
+            to=Action.ToChoices.MODEL, app_label="auth", element="user", name="Users"
+        )
+        parent = Menu.objects.create(name="Module", action=action, sequence=1)
+        self.menu = Menu.objects.create(
+            name="Users", action=action, parent=parent, sequence=2
+        )
+
+    def test_fieldsets_of_a_dict(self):
+        plan = DetailPlan.compile(
+            Menu, {"Main": ("name", ("action", "sequence")), None: ["parent__name"]}
+        )
+        self.assertEqual(
+            plan.fieldsets,
+            (
+                ("Main", ((12, ("name",)), (6, ("action", "sequence")))),
+                ("", ((12, ("parent__name",)),)),
+            ),
+        )
+        self.assertEqual(
+            [field for field, _ in plan.accessors],
+            ["name", "action", "sequence", "parent__name"],
+        )
+        self.assertEqual(plan.join_plan, (("action", "parent"), ()))
+
+    def test_object_and_relations_in_one_query(self):
+        plan = DetailPlan.compile(Menu, ("name", ("action__name", "parent__name")))
+        queryset = QueryService.apply_join_plan(Menu.objects.all(), plan.join_plan)
+        with self.assertNumQueries(1):
+            results, fieldsets = plan.get_results(queryset.get(pk=self.menu.pk))
+            self.assertEqual(
+                [value for _, value, _, _ in results], ["Users", "Users", "Module"]
+            )
+        self.assertEqual(
+            [
+                [value for _, value, _, _ in row["fields"]]
+                for row in fieldsets[0]["fieldset"]
+            ],
+            [["Users"], ["Users", "Module"]],
+        )
+
+
+class NeighborTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        logins = (now, now, now + datetime.timedelta(days=1), None, None)
+        self.users = [
+            User.objects.create(username=f"user{index}", last_login=login)
+            for index, login in enumerate(logins)
+        ]
+
+    def assertNeighbors(self, order_by, positions):
+        users = [self.users[position] for position in positions]
+        for index, user in enumerate(users):
+            nav = NeighborService.get_previous_and_next(
+                User.objects.all(), user, order_by=order_by
+            )
+            self.assertEqual(
+                (nav["previous"], nav["next"], nav["current_index"]),
+                (
+                    users[index - 1] if index else None,
+                    users[index + 1] if index + 1 < len(users) else None,
+                    index,
+                ),
+            )
+            self.assertEqual(nav["total_entries"], len(users))
+
+    def test_ties_by_pk(self):
+        self.assertNeighbors(("last_login",), [0, 1, 2, 3, 4])
+
+    def test_descending_keys(self):
+        self.assertNeighbors(("-last_login",), [4, 3, 2, 1, 0])
+        self.assertNeighbors(("-last_login", "username"), [3, 4, 2, 0, 1])
+
+    def test_null_keys(self):
+        # Nulls go after the values ascending and before them descending
+        self.assertNeighbors(("last_login", "-username"), [1, 0, 2, 4, 3])
+        nav = NeighborService.get_previous_and_next(
+            User.objects.filter(last_login__isnull=True),
+            self.users[3],
+            order_by=("last_login",),
+            position=False,
+        )
+        self.assertEqual((nav["previous"], nav["next"]), (None, self.users[4]))
+        self.assertIsNone(nav["current_index"])
+
+    def test_instance_out_of_the_queryset(self):
+        queryset = User.objects.filter(last_login__isnull=True)
+        self.assertIsNone(
+            NeighborService.get_previous_and_next(queryset, self.users[0])
+        )
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        caches[settings.CACHE_ALIAS].clear()
+        User.objects.bulk_create(
+            User(username=f"user{index:02d}") for index in range(12)
+        )
+        self.ids = list(User.objects.values_list("pk", flat=True))
+        self.model_site = site.get_modelsite(User)
+        self.saved = []
+        post_save.connect(self.receiver, sender=User)
+        self.addCleanup(post_save.disconnect, self.receiver, sender=User)
+
+    def receiver(self, instance, **kwargs):
+        self.saved.append(instance.pk)
+
+    def run_update(self, values):
+        with mock.patch.object(self.model_site, "batch_chunk_size", 5):
+            with CaptureQueriesContext(connection) as context:
+                job = BatchService.run(
+                    self.model_site, BatchService.UPDATE, self.ids, values
+                )
+        updates = [
+            query
+            for query in context.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        return job, updates
+
+    def test_update_sends_signals(self):
+        with mock.patch.object(self.model_site, "batch_signals", True):
+            job, updates = self.run_update({"is_active": False})
+        self.assertEqual((job["status"], job["affected"]), (BatchService.DONE, 12))
+        self.assertEqual(sorted(self.saved), sorted(self.ids))
+        self.assertEqual(len(updates), 12)
+        self.assertFalse(User.objects.filter(pk__in=self.ids, is_active=True).exists())
+
+    def test_update_by_chunks_without_signals(self):
+        job, updates = self.run_update({"is_active": False})
+        self.assertEqual((job["status"], job["affected"]), (BatchService.DONE, 12))
+        self.assertEqual(self.saved, [])
+        self.assertEqual(len(updates), 3)
+        self.assertFalse(User.objects.filter(pk__in=self.ids, is_active=True).exists())
+
+    def test_failed_job(self):
+        with self.assertLogs("superadmin.batches", "ERROR"):
+            job, updates = self.run_update({"date_joined": "not a date"})
+        self.assertEqual((job["status"], job["processed"]), (BatchService.ERROR, 0))
+        self.assertTrue(job["error"])
+
+    def test_delete_with_cascades(self):
+        self.assertFalse(BatchService.can_fast_delete(self.model_site))
+        job = BatchService.run(self.model_site, BatchService.DELETE, self.ids)
+        self.assertEqual((job["status"], job["affected"]), (BatchService.DONE, 12))
+        self.assertFalse(User.objects.filter(pk__in=self.ids).exists())
+
+
+class BackgroundBatchTests(TransactionTestCase):
+    """Out of a transaction, the background thread sees the rows"""
+
+    def setUp(self):
+        caches[settings.CACHE_ALIAS].clear()
+        User.objects.bulk_create(User(username=f"user{index}") for index in range(6))
+        self.ids = list(User.objects.values_list("pk", flat=True))
+        self.model_site = site.get_modelsite(User)
+
+    def run_update(self):
+        with mock.patch.object(self.model_site, "batch_background_threshold", 5):
+            return BatchService.run(
+                self.model_site, BatchService.UPDATE, self.ids, {"is_active": False}
+            )
+
+    def test_local_cache_runs_in_the_request(self):
+        with self.assertWarns(RuntimeWarning):
+            job = self.run_update()
+        self.assertEqual((job["status"], job["affected"]), (BatchService.DONE, 6))
+
+    def test_progress_in_a_shared_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": directory,
+        }
+        with override_settings(CACHES={settings.CACHE_ALIAS: cache}):
+            job = self.run_update()
+            self.assertEqual(job["status"], BatchService.RUNNING)
+            for _ in range(100):
+                job = BatchService.get_job(job["id"])
+                if job["status"] != BatchService.RUNNING:
+                    break
+                time.sleep(0.05)
+        self.assertEqual((job["status"], job["affected"]), (BatchService.DONE, 6))
+        self.assertFalse(User.objects.filter(is_active=True).exists())
+
+
+class CountTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.permission = Permission.objects.get(codename="view_group")
+        for index in range(12):
+            group = Group.objects.create(name=f"group{index:02d}")
+            if index % 2:
+                group.permissions.add(self.permission)
+        self.url = reverse(site.get_modelsite(Group).get_url_name("list"))
+
+    def count(self, queryset):
+        return CountService(site.get_modelsite(Group)).count(queryset)
+
+    def test_cached_count_follows_the_joined_models(self):
+        queryset = Group.objects.filter(permissions__codename__icontains="view")
+        self.assertEqual(self.count(queryset), 6)
+        self.permission.codename = "see_group"
+        self.permission.save()
+        self.assertEqual(self.count(queryset), 0)
+
+    @mock.patch.object(settings, "COUNT_ESTIMATE_THRESHOLD", 0)
+    @mock.patch.object(CountService, "estimate", return_value=3)
+    def test_pages_after_a_short_estimate(self, estimate):
+        with mock.patch.object(site.get_modelsite(Group), "count_estimate", True):
+            response = self.client.get(self.url, {"page": 3})
+            missing = self.client.get(self.url, {"page": 4})
+        self.assertEqual(response.content.decode(), "group10,group11,|12")
+        self.assertEqual(missing.status_code, 404)
+
+
+class FilterTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(5):
+            Group.objects.create(name=f"group{index}")
+
+    def get(self, field="groups", model="user", etag=None, **params):
+        kwargs = {"app": "auth", "model": model, "field": field}
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(reverse("site:filter", kwargs=kwargs), params, **headers)
+
+    @mock.patch.object(settings, "FILTER_PAGE_SIZE", 2)
+    def test_autocomplete_pages(self):
+        first, last = self.get(page=1).json(), self.get(page=3).json()
+        self.assertEqual(
+            [choice["text"] for choice in first["choices"]], ["group0", "group1"]
+        )
+        self.assertEqual(first["pagination"], {"more": True})
+        self.assertEqual([choice["text"] for choice in last["choices"]], ["group4"])
+        self.assertEqual(last["pagination"], {"more": False})
+        searched = self.get(term="p3").json()
+        self.assertEqual([choice["text"] for choice in searched["choices"]], ["group3"])
+
+    def test_autocomplete_not_modified(self):
+        response = self.get(term="group")
+        etag = response["ETag"]
+        self.assertEqual(self.get(term="group", etag=etag).status_code, 304)
+        Group.objects.create(name="group5")
+        response = self.get(term="group", etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["choices"]), 6)
+
+    def test_untracked_model_is_not_cached(self):
+        response = self.get("content_type", "permission", term="zzz")
+        self.assertNotIn("ETag", response)
+        self.assertEqual(response.json()["choices"], [])
+        ContentType.objects.create(app_label="zzz", model="zzz")
+        choices = self.get("content_type", "permission", term="zzz").json()["choices"]
+        self.assertEqual(len(choices), 1)
+
+    def test_choices_without_objects(self):
+        view = FilterView.as_view()
+        request = RequestFactory().get("/")
+        with self.assertNumQueries(1):
+            response = view(request, app="auth", model="user", field="groups")
+        self.assertEqual(
+            [choice["text"] for choice in json.loads(response.content)["choices"]],
+            [f"group{index}" for index in range(5)],
+        )
+
+
+class UserFacetSite(ModelSite):
+    search_params = ("groups__name__icontains",)
+    filter_fields = ("is_staff", "is_active", "username")
+    facet_max_choices = 2
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        caches[settings.CACHE_ALIAS].clear()
+        self.site = UserFacetSite(User)
+        self.group = Group.objects.create(name="editors")
+        for username, is_staff in (("ann", True), ("bob", False), ("cid", False)):
+            user = User.objects.create(username=username, is_staff=is_staff)
+            user.groups.add(self.group)
+
+    def get_facets(self, queryset):
+        return {
+            facet["name"]: {
+                choice["value"]: choice["count"] for choice in facet["choices"]
+            }
+            for facet in FacetService.get_facets(self.site, queryset)
+        }
+
+    def test_cached_facets(self):
+        queryset = User.objects.filter(groups__name__icontains="edit")
+        facets = {"is_staff": {True: 1, False: 2}, "is_active": {True: 3}}
+        self.assertEqual(self.get_facets(queryset), facets)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_facets(queryset.all()), facets)
+
+    def test_changes_of_the_joined_models(self):
+        queryset = User.objects.filter(groups__name__icontains="edit")
+        self.assertEqual(self.get_facets(queryset)["is_active"], {True: 3})
+        User.objects.filter(username="bob").update(is_active=False)
+        # The update does not send signals, the generations are the same
+        self.assertEqual(self.get_facets(queryset)["is_active"], {True: 3})
+        self.group.name = "authors"
+        self.group.save()
+        self.assertEqual(self.get_facets(queryset), {"is_staff": {}, "is_active": {}})
+
+    def test_fields_with_more_choices_than_allowed(self):
+        self.site.facet_max_choices = 1
+        self.assertEqual(
+            self.get_facets(User.objects.filter(username__in=["ann", "bob"])),
+            {"is_active": {True: 2}},
+        )
+
+
+class ActionSite(ModelSite):
+    search_params = ("name__icontains", "menu__name__icontains")
+
+
+class IndexedSearchTests(TransactionTestCase):
+    """The table of the index is created out of a transaction, like migrate"""
+
+    def setUp(self):
+        self.backend = IndexedSearchBackend(ActionSite(Action))
+        connection = self.backend.get_connection()
+        if not self.backend.is_supported(connection):
+            self.skipTest("The database has no full text index")
+        self.backend.connect()
+        self.addCleanup(IndexedSearchBackend.dependents.clear)
+        self.actions = [
+            Action.objects.create(
+                to=Action.ToChoices.CLASSVIEW,
+                app_label="superadmin",
+                element=element,
+                name=element,
+            )
+            for element in ("ModuleView", "ReportView")
+        ]
+        self.menu = Menu.objects.create(
+            name="Invoices", action=self.actions[0], sequence=1
+        )
+        self.backend.build()
+        table = connection.ops.quote_name(self.backend.get_table(connection))
+        self.addCleanup(connection.cursor().execute, f"DROP TABLE {table}")
+
+    def search(self, search):
+        queryset = self.backend.search(Action.objects.all(), search)
+        return list(queryset.values_list("element", flat=True))
+
+    def test_missing_table(self):
+        backend = IndexedSearchBackend(GroupSite(Group))
+        connection = backend.get_connection()
+        self.assertFalse(backend.has_index(connection))
+        with self.assertNumQueries(0):
+            self.assertFalse(backend.has_index(connection))
+        # Built by other process, it is seen after the interval
+        IndexedSearchBackend(GroupSite(Group)).build()
+        table = connection.ops.quote_name(backend.get_table(connection))
+        self.addCleanup(connection.cursor().execute, f"DROP TABLE {table}")
+        self.assertFalse(backend.has_index(connection))
+        with mock.patch.object(backend, "MISSING_INTERVAL", 0):
+            self.assertTrue(backend.has_index(connection))
+        with self.assertNumQueries(0):
+            self.assertTrue(backend.has_index(connection))
+
+    def test_related_row_moved(self):
+        with transaction.atomic():
+            self.menu.action = self.actions[1]
+            self.menu.save()
+            # The related objects are reindexed on commit
+            self.assertEqual(self.search("invoices"), ["ModuleView"])
+        self.assertEqual(self.search("invoices"), ["ReportView"])
+
+    def test_related_row_deleted(self):
+        self.menu.delete()
+        self.assertEqual(self.search("invoices"), [])
+        self.assertEqual(self.search("module"), ["ModuleView"])
+
+
+class ConditionalTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.group = Group.objects.create(name="editors")
+        model_site = site.get_modelsite(Group)
+        self.list_url = reverse(model_site.get_url_name("list"))
+        self.detail_url = reverse(
+            model_site.get_url_name("detail"), kwargs={"pk": self.group.pk}
+        )
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_list(self):
+        etag = self.assertNotModified(self.list_url)
+        Group.objects.create(name="readers")
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), "editors,readers,|2")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail(self):
+        etag = self.assertNotModified(self.detail_url)
+        self.group.name = "writers"
+        self.group.save()
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode(), "writers")
+
+    def test_other_user(self):
+        etag = self.assertNotModified(self.list_url)
+        other = User.objects.create_superuser("other", "other@example.com", "x")
+        self.client.force_login(other)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class InstrumentationTests(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            Group.objects.create(name=f"group{index}")
+        get_sinks.cache_clear()
+        self.addCleanup(get_sinks.cache_clear)
+
+    def get_record(self, **values):
+        record = {
+            "site": "auth.group",
+            "action": "list",
+            "status": 200,
+            "total": 0.01,
+            "db_time": 0.004,
+            "queries": 2,
+            "rows": 3,
+            "phases": {"get_rows": 0.002},
+        }
+        record.update(values)
+        return record
+
+    @mock.patch.object(settings, "INSTRUMENTATION", True)
+    def test_queries_of_a_request(self):
+        sink = ListSink()
+        view = ListView.get_view_class(GroupSite(Group)).as_view()
+        request = RequestFactory().get("/")
+        request.user, request.session = self.user, {}
+        with mock.patch.object(settings, "INSTRUMENTATION_SINKS", [sink]):
+            with CaptureQueriesContext(connection) as context:
+                response = view(request)
+                self.assertEqual(sink.records, [])
+                response.render()
+        [record] = sink.records
+        self.assertEqual(
+            (record["site"], record["action"], record["status"], record["rows"]),
+            ("auth.group", "list", 200, 3),
+        )
+        self.assertEqual(record["queries"], len(context.captured_queries))
+        self.assertGreater(record["queries"], 0)
+        self.assertIn("render", record["phases"])
+        self.assertNotIn(
+            True,
+            [isinstance(wrapper, Measure) for wrapper in connection.execute_wrappers],
+        )
+
+    def test_measure_of_the_queries(self):
+        measure = Measure(site.get_modelsite(Group), "list")
+        with connection.execute_wrapper(measure):
+            list(Group.objects.all())
+            Group.objects.count()
+        record = measure.finish()
+        self.assertEqual(record["queries"], 2)
+        self.assertLessEqual(record["db_time"], record["total"])
+
+    def test_ring_buffer_stats(self):
+        RingBufferSink.records.clear()
+        self.addCleanup(RingBufferSink.records.clear)
+        sink = RingBufferSink()
+        for total in (0.01, 0.02, 0.03, 0.04):
+            sink.emit(self.get_record(total=total))
+        sink.emit(self.get_record(action="detail", total=0.005, rows=1))
+        [stat, detail] = RingBufferSink.get_stats()
+        self.assertEqual(
+            (stat["action"], stat["count"], stat["p50"], stat["p95"], stat["max"]),
+            ("list", 4, 20, 30, 40),
+        )
+        self.assertEqual((stat["queries"], stat["rows"]), (2, 3))
+        self.assertEqual((detail["action"], detail["rows"]), ("detail", 1))
+
+    def test_logging_and_failed_sinks(self):
+        failing = mock.Mock(emit=mock.Mock(side_effect=ValueError))
+        sinks = [failing, "superadmin.instrumentation.LoggingSink"]
+        with mock.patch.object(settings, "INSTRUMENTATION_SINKS", sinks):
+            with self.assertLogs("superadmin.instrumentation") as logs:
+                emit(self.get_record())
+        self.assertEqual(
+            [record.levelname for record in logs.records], ["ERROR", "INFO"]
+        )
+        self.assertIn("auth.group list status=200 total=10.0ms", logs.output[1])
+
+    def test_statsd_lines(self):
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(receiver.close)
+        receiver.bind(("127.0.0.1", 0))
+        receiver.settimeout(5)
+        with mock.patch.object(settings, "STATSD_PORT", receiver.getsockname()[1]):
+            sink = StatsDSink()
+        self.addCleanup(sink.socket.close)
+        sink.emit(self.get_record())
+        lines = receiver.recv(4096).decode().split("\n")
+        self.assertEqual(lines[0], "superadmin.auth.group.list.requests:1|c")
+        self.assertIn("superadmin.auth.group.list.queries:2|g", lines)
+        self.assertIn("superadmin.auth.group.list.get_rows:2.000|ms", lines)
+
+    def test_stats_only_for_staff(self):
+        view = StatsView.as_view()
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        self.assertEqual(view(request).status_code, 403)
+        request.user = User.objects.create_user("ann")
+        self.assertEqual(view(request).status_code, 403)
+        request.user = self.user
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {"stats": []})
+
+
+class UserImportSite(ModelSite):
+    fields = ("username", "first_name", "email")
+    import_key = ("username",)
+    import_batch_size = 2
+
+
+class DateKeyImportSite(ModelSite):
+    fields = ("username", "date_joined")
+    import_key = ("date_joined",)
+
+
+class ImportTests(TestCase):
+    def run_import(self, *lines):
+        text = "\n".join(("username,first_name,email", *lines))
+        importer = CSVImporter(UserImportSite(User), io.BytesIO(text.encode()))
+        return importer.run()
+
+    def test_upsert_by_natural_key(self):
+        User.objects.create(username="bob", first_name="Bob")
+        # The two rows of ann are in different batches, the second one updates
+        result = self.run_import(
+            "bob,Robert,bob@example.com",
+            "ann,Ann,ann@example.com",
+            "cid,Cid,cid@example.com",
+            "ann,Anne,ann@example.com",
+        )
+        self.assertEqual(
+            (result["total"], result["created"], result["updated"]), (4, 2, 2)
+        )
+        self.assertEqual(result["errors"], [])
+        self.assertEqual(
+            dict(User.objects.values_list("username", "first_name")),
+            {"bob": "Robert", "ann": "Anne", "cid": "Cid"},
+        )
+
+    def test_errors_by_line(self):
+        result = self.run_import(
+            "ann,Ann,ann@example.com",
+            "bad,Bad,not an email",
+            ",Nobody,nobody@example.com",
+        )
+        self.assertEqual((result["created"], result["invalid"]), (1, 2))
+        self.assertEqual(
+            [(error["line"], list(error["errors"])) for error in result["errors"]],
+            [(3, ["email"]), (4, ["username"])],
+        )
+        self.assertFalse(User.objects.filter(username="bad").exists())
+
+    def test_key_of_cleaned_values(self):
+        User.objects.create(
+            username="ann",
+            date_joined=timezone.make_aware(datetime.datetime(2024, 1, 5, 10)),
+        )
+        text = "username,date_joined\nanne,2024-01-05 10:00\n"
+        result = CSVImporter(DateKeyImportSite(User), io.BytesIO(text.encode())).run()
+        self.assertEqual((result["created"], result["updated"]), (0, 1))
+        self.assertEqual(
+            list(User.objects.values_list("username", flat=True)), ["anne"]
+        )
+
+    def test_composite_key_by_chunks(self):
+        user = User.objects.create(username="user7", first_name="X")
+        site = UserImportSite(User)
+        site.import_key = ("username", "first_name")
+        keys = {(f"user{index}", "X") for index in range(1200)}
+        with self.assertNumQueries(3):
+            self.assertEqual(get_existing(site, keys), {("user7", "X"): user})
+
+    def test_invalid_csv(self):
+        view = ImportView.as_view(site=UserImportSite(User))
+        text = 'username,first_name,email\nann,"%s",ann@example.com\n' % ("x" * 200000)
+        request = RequestFactory().post(
+            "/", {"file": SimpleUploadedFile("users.csv", text.encode())}
+        )
+        request.user = User.objects.create_superuser("root", "root@example.com", "x")
+        response = view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"field larger than field limit", response.content)
+
+
+class PermissionServiceTests(TestCase):
+    def setUp(self):
+        caches[settings.CACHE_ALIAS].clear()
+        self.group = Group.objects.create(name="editors")
+        self.group.permissions.add(Permission.objects.get(codename="change_group"))
+        self.user = User.objects.create_user("ann")
+        self.user.groups.add(self.group)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_user"))
+
+    def get(self, user):
+        # A new object, the snapshot is kept on the user of the request
+        return PermissionService.get(User.objects.get(pk=user.pk))
+
+    def test_user_and_group_permissions(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            snapshot = PermissionService.get(user)
+            self.assertIs(PermissionService.get(user), snapshot)
+        self.assertEqual(snapshot.permissions, {"auth.change_group", "auth.view_user"})
+        self.assertEqual(snapshot.permissions, user.get_all_permissions())
+        self.assertTrue(snapshot.has_perms(["auth.change_group", "auth.view_user"]))
+        self.assertFalse(snapshot.has_any_perms(["auth.delete_group", "auth.add_user"]))
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        snapshot = self.get(self.user)
+        self.assertFalse(snapshot.has_perm("auth.view_user"))
+        self.assertEqual(snapshot.permissions, frozenset())
+
+    def test_superuser(self):
+        user = User.objects.create_superuser("root", "root@example.com", "x")
+        with self.assertNumQueries(1):
+            snapshot = self.get(user)
+        self.assertTrue(snapshot.has_perm("auth.delete_group"))
+        self.assertEqual(snapshot.fingerprint, PermissionSnapshot.SUPERUSER)
+        user.is_active = False
+        self.assertFalse(PermissionSnapshot(user, ()).has_perm("auth.delete_group"))
+
+    @mock.patch.object(settings, "PERMISSION_CACHE_TIMEOUT", 60)
+    def test_cache_until_a_change(self):
+        fingerprint = self.get(self.user).fingerprint
+        with self.assertNumQueries(1):
+            # Only the user, the permissions come from the cache
+            self.assertEqual(self.get(self.user).fingerprint, fingerprint)
+        self.group.permissions.add(Permission.objects.get(codename="delete_group"))
+        self.assertTrue(self.get(self.user).has_perm("auth.delete_group"))
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.get(self.user).has_perm("auth.change_group"))
+        self.user.user_permissions.clear()
+        self.assertFalse(self.get(self.user).has_perm("auth.view_user"))
@@ -1,20 +1,24 @@
 # Python
 import inspect
+from functools import lru_cache
 from importlib import import_module
 
 
+@lru_cache(maxsize=None)
 def import_class(module_name, class_name):
-    cls = None
+    """Resolve a class by its module and name, it is memoized by process"""
     try:
         module = import_module(module_name)
-        members = inspect.getmembers(module, inspect.isclass)
-        for name, klass in members:
-            if name == class_name:
-                cls = klass
-                break
     except ModuleNotFoundError as error:
         print("Not found %s" % module_name)
-    return cls
+        return None
+    cls = getattr(module, class_name, None)
+    return cls if inspect.isclass(cls) else None
+
+
+def clear_import_cache():
+    """Forget the resolved classes, for tests or reloaded modules"""
+    import_class.cache_clear()
 
 
 def import_mixin(name):
@@ -37,23 +41,3 @@ def import_all_mixins():
 
     return mixins
 
-
-def get_user_menu(menu_list, user):
-    menus = list()
-    for menu in menu_list:
-        obj_menu = {
-            "name": menu.name,
-            "url": menu.get_url(),
-            "icon": menu.icon_class or "",
-            "submenus": get_user_menu(menu.submenus.all(), user),
-            "is_root": not menu.parent,
-            "is_group": menu.is_group,
-        }
-
-        if not obj_menu["submenus"] and (
-            menu.is_group or not menu.action.has_permissions(user)
-        ):
-            continue
-
-        menus.append(obj_menu)
-    return menus
@@ -4,5 +4,9 @@ from .update import UpdateView, MassUpdateView
 from .detail import DetailView
 from .delete import DeleteView, MassDeleteView
 from .duplicate import DuplicateView
+from .export import ExportView
+from .importer import ImportView
+from .batch import BatchView
 from .filter import FilterView, SessionView
+from .stats import StatsView
 from .base import ModuleView
@@ -1,22 +1,41 @@
+# Python
+import hashlib
+
 # Django
 from django.views.generic import TemplateView, View
 from django.core.exceptions import ImproperlyConfigured
 from django.conf import settings
 from django.contrib import messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
-# Utils
-from ..utils import get_user_menu
+# Local
+from ..services import FilterService, GenerationService
+from .. import settings as superadmin_settings
 
 
 class SiteView(View):
+    """
+    Entry point of the views of a model site. The composed view class is built
+    by ``get_view_class`` once by model site and then reused by every request.
+    """
+
     site = None
 
     def dispatch(self, request, *args, **kwargs):
         return self.view(request, *args, **kwargs)
 
+    def view(self, request, *args, **kwargs):
+        view = self.get_site().get_view(self.__class__)
+        return view(request, *args, **kwargs)
+
     def get_site(self):
         return self.site
 
+    @classmethod
+    def get_view_class(cls, site):
+        raise NotImplementedError
+
 
 class ModuleView(TemplateView):
     """Clase para definir las vistas de los módulos de aplicaciones"""
@@ -32,8 +51,12 @@ class ModuleView(TemplateView):
         else:
             context.update({"site": opts})
 
+        from ..menus import MenuService
+
         data = {
-            "object_list": get_user_menu(self.menu.submenus.all(), self.request.user)
+            "object_list": MenuService.get_user_menu(
+                self.request.user, parent=self.menu.pk
+            )
         }
 
         context.update(data)
@@ -47,28 +70,89 @@ class ModuleView(TemplateView):
         return [template_name]
 
 
-def get_base_view(ClassView, mixins, site):
-    class View(ClassView):
-        def get_context_data(self, **kwargs):
-            context = super().get_context_data(**kwargs)
-            opts = {
-                "title": self.model._meta.verbose_name_plural,
-                "app_name": self.model._meta.app_label,
-                "model_name": self.model._meta.model_name,
-            }
-
-            if "site" in context:
-                context["site"].update(opts)
-            else:
-                context.update({"site": opts})
-            return context
-
-        def form_valid(self, form):
-            messages.success(self.request, "Se ha guardado correctamente.")
-            return super().form_valid(form)
-
-    View.__bases__ = (*mixins, *View.__bases__)
-    View.site = site
-    View.model = site.model
-    View.queryset = site.queryset
-    return View
+class BaseViewMixin:
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        opts = {
+            "title": self.model._meta.verbose_name_plural,
+            "app_name": self.model._meta.app_label,
+            "model_name": self.model._meta.model_name,
+        }
+
+        if "site" in context:
+            context["site"].update(opts)
+        else:
+            context.update({"site": opts})
+        return context
+
+    def form_valid(self, form):
+        messages.success(self.request, "Se ha guardado correctamente.")
+        return super().form_valid(form)
+
+
+class ConditionalMixin:
+    """
+    Answer 304 Not Modified before building the context when the ETag, made
+    of the generations of the models in the page, the user, the menu and the
+    session filters, did not change. Only for model sites with
+    ``conditional_requests``.
+    """
+
+    def get(self, request, *args, **kwargs):
+        # A 304 would hide the pending messages without consuming them
+        if not self.site.conditional_requests or len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag_parts(self):
+        from ..menus import MenuService
+
+        user = self.request.user
+        _, fingerprint = MenuService.get_permissions(user)
+        params = FilterService.get_params(self.site.model, self.request.session)
+        return [
+            self.site.model._meta.label_lower,
+            self.request.get_full_path(),
+            user.pk,
+            fingerprint,
+            MenuService.get_generation(),
+            repr(sorted(params.items())),
+            *(GenerationService.get(model) for model in self.site.conditional_models),
+        ]
+
+    def get_last_modified(self):
+        return None
+
+    def get_validators(self):
+        last_modified = self.get_last_modified()
+        parts = "|".join(str(part) for part in self.get_etag_parts())
+        return f'"{hashlib.md5(parts.encode()).hexdigest()}"', last_modified
+
+
+def get_base_view(ClassView, mixins, site, **attrs):
+    """Create the view class of the site, without mutate any __bases__"""
+    attrs = {
+        "site": site,
+        "model": site.model,
+        "queryset": site.queryset,
+        **attrs,
+    }
+    name = f"{site.model.__name__}{ClassView.__name__}"
+    bases = (BaseViewMixin, *mixins, ClassView)
+    if superadmin_settings.INSTRUMENTATION:
+        from ..instrumentation import InstrumentationMixin
+
+        bases = (InstrumentationMixin, *bases)
+    return type(name, bases, attrs)
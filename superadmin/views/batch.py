@@ -0,0 +1,39 @@
+""" Progress of the mass actions """
+# Django
+from django.http import Http404, JsonResponse
+from django.urls import reverse
+from django.views.generic import View
+
+# Local
+from ..batches import BatchService
+
+
+def get_batch_response(site, job, message):
+    """Result of a finished job, or the url for polling a job in background"""
+    if job["status"] == BatchService.RUNNING:
+        url = reverse(site.get_url_name("batch"), kwargs={"job": job["id"]})
+        return JsonResponse({"job": job, "url": url}, status=202)
+    if job["status"] == BatchService.ERROR:
+        return JsonResponse({"error": job["error"], "job": job}, status=500)
+    return JsonResponse(
+        {"success": f"{job['affected']} {message}.", "job": job}, status=200
+    )
+
+
+class BatchView(View):
+    """Progress of a mass action of the model site, only for the user that started it"""
+
+    site = None
+    http_method_names = [
+        "get",
+    ]
+
+    def get(self, request, *args, **kwargs):
+        job = BatchService.get_job(kwargs.get("job"))
+        if (
+            not job
+            or job["model"] != self.site.model._meta.label_lower
+            or job["user"] != request.user.pk
+        ):
+            raise Http404
+        return JsonResponse({"job": job})
@@ -79,26 +79,22 @@ class CreateMixin:
 
 
 class CreateView(SiteView):
-    def view(self, request, *args, **kwargs):
-        """Crear la List View del modelo"""
-        # Class
+    @classmethod
+    def get_view_class(cls, site):
+        """Crear la Create View del modelo"""
         mixins = import_all_mixins() + [CreateMixin]
-        if self.site.inlines and isinstance(self.site.inlines, (list, tuple, dict)):
+        if site.inlines and isinstance(site.inlines, (list, tuple, dict)):
             InlinesMixin = import_mixin("InlinesMixin")
 
             class Inlines(InlinesMixin):
-                inlines = self.site.inlines
+                inlines = site.inlines
 
             mixins += [Inlines]
-        View = get_base_view(BaseCreateView, mixins, self.site)
-
-        # Set attributes
-        View.form_class = self.site.form_class
-        View.fields = self.site.fields
-
-        if self.site.create_mixins:
-            View.__bases__ = (*self.site.create_mixins, *View.__bases__)
-        else:
-            View.__bases__ = (*self.site.form_mixins, *View.__bases__)
-        view = View.as_view()
-        return view(request, *args, **kwargs)
+        site_mixins = site.create_mixins or site.form_mixins
+        return get_base_view(
+            BaseCreateView,
+            [*site_mixins, *mixins],
+            site,
+            form_class=site.form_class,
+            fields=site.fields,
+        )
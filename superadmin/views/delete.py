@@ -2,10 +2,13 @@
 # Django
 from django.views.generic import View
 from django.views.generic import DeleteView as BaseDeleteView
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponseForbidden
 
 # Local
 from .base import SiteView, get_base_view
+from .batch import get_batch_response
+from ..batches import BatchService
+from ..services import PermissionService
 from ..shortcuts import get_urls_of_site
 from ..utils import import_all_mixins
 
@@ -24,16 +27,11 @@ class DeleteMixin:
 
 
 class DeleteView(SiteView):
-    def view(self, request, *args, **kwargs):
-        """Crear la List View del modelo"""
-        # Class
+    @classmethod
+    def get_view_class(cls, site):
+        """Crear la Delete View del modelo"""
         mixins = import_all_mixins() + [DeleteMixin]
-        View = get_base_view(BaseDeleteView, mixins, self.site)
-
-        # Set attributes
-        View.__bases__ = (*self.site.delete_mixins, *View.__bases__)
-        view = View.as_view()
-        return view(request, *args, **kwargs)
+        return get_base_view(BaseDeleteView, [*site.delete_mixins, *mixins], site)
 
 
 class MassDeleteView(View):
@@ -46,14 +44,10 @@ class MassDeleteView(View):
         model = self.site.model
         ids = request.POST.getlist("ids")
 
-        if not self.request.user.has_perm(
+        if not PermissionService.get(self.request.user).has_perm(
             f"{model._meta.app_label}.delete_{model._meta.model_name}"
         ):
             return HttpResponseForbidden()
 
-        objects = model.objects.filter(id__in=ids)
-        objects.delete()
-
-        return JsonResponse(
-            {"success": f"{len(object)} objectos eliminados."}, status=200
-        )
+        job = BatchService.run(self.site, BatchService.DELETE, ids, user=request.user)
+        return get_batch_response(self.site, job, "objectos eliminados")
@@ -1,15 +1,10 @@
 """ """
-# Python
-from functools import reduce
-
 # Django
-from django.core.exceptions import ImproperlyConfigured
 from django.views.generic import DetailView as BaseDetailView
-from django.contrib.admin.utils import flatten
 
 # Local
-from .base import SiteView, get_base_view
-from ..services import FieldService, FilterService
+from .base import ConditionalMixin, SiteView, get_base_view
+from ..services import CountService, FilterService, NeighborService, QueryService
 from ..utils import import_all_mixins
 from ..shortcuts import get_urls_of_site
 
@@ -25,7 +20,13 @@ class DetailMixin:
         flatten_results, fieldset_results = self.get_results()
         params = FilterService.get_params(self.site.model, self.request.session)
         queryset = FilterService.filter(self.site.queryset, params)
-        nav = FilterService.get_previous_and_next(queryset, self.object)
+        nav = NeighborService.get_previous_and_next(
+            queryset,
+            self.object,
+            order_by=self.site.order_by,
+            counter=CountService.get_for_request(self.request, self.site),
+            position=self.site.navigation_position,
+        )
         if nav:
             nav["previous_url"] = (
                 get_urls_of_site(self.site, nav["previous"])[self.action]
@@ -50,68 +51,48 @@ class DetailMixin:
 
         return context
 
-    def get_results(self):
-        if isinstance(self.site.detail_fields, (list, tuple)):
-            fields = flatten(self.site.detail_fields)
-        elif isinstance(self.site.detail_fields, dict):
-            fields = reduce(
-                lambda acc, fieldset: acc + flatten(fieldset),
-                self.site.detail_fields.values(),
-                [],
-            )
-        else:
-            raise ImproperlyConfigured(
-                "The fieldsets must be an instance of list, tuple or dict"
-            )
-        fields = fields if fields else (field.name for field in self.model._meta.fields)
-        results = {
-            field: (
-                FieldService.get_field_label(self.object, field),
-                FieldService.get_field_value(self.object, field),
-                FieldService.get_field_type(self.object, field),
-                field,
-            )
-            for field in fields
-        }
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return QueryService.apply_join_plan(queryset, self.site.detail_plan.join_plan)
+
+    def get_version(self):
+        """Version and last modification of the object, without loading it"""
+        if not hasattr(self, "version"):
+            fields = [
+                field
+                for field in (self.site.version_field, self.site.last_modified_field)
+                if field
+            ]
+            self.version = {}
+            if fields:
+                queryset = self.get_queryset()
+                pk = self.kwargs.get(self.pk_url_kwarg)
+                slug = self.kwargs.get(self.slug_url_kwarg)
+                if pk is not None:
+                    queryset = queryset.filter(pk=pk)
+                elif slug is not None:
+                    queryset = queryset.filter(**{self.get_slug_field(): slug})
+                row = queryset.values_list(*fields).first()
+                self.version = dict(zip(fields, row)) if row else {}
+        return self.version
+
+    def get_etag_parts(self):
+        return [*super().get_etag_parts(), *self.get_version().values()]
+
+    def get_last_modified(self):
+        value = self.get_version().get(self.site.last_modified_field)
+        return int(value.timestamp()) if value else None
 
-        flatten_results = results.values()
-
-        def parse(fieldset):
-            def wrap(fields):
-                fields = fields if isinstance(fields, (list, tuple)) else [fields]
-                return {
-                    "bs_cols": int(12 / len(fields)),
-                    "fields": [results.get(field, ("", "", "")) for field in fields],
-                }
-
-            fieldset_list = list(map(wrap, fieldset))
-            return fieldset_list
-
-        fieldsets_list = self.site.detail_fields
-        fieldsets = (
-            [(None, fieldsets_list)]
-            if isinstance(fieldsets_list, (list, tuple))
-            else fieldsets_list.items()
-        )
-        fieldsets_results = [
-            {"title": title or "", "fieldset": parse(fieldset)}
-            for title, fieldset in fieldsets
-        ]
-
-        return flatten_results, fieldsets_results
+    def get_results(self):
+        return self.site.detail_plan.get_results(self.object)
 
     def get_slug_field(self):
         return self.site.slug_field or super().get_slug_field()
 
 
 class DetailView(SiteView):
-    def view(self, request, *args, **kwargs):
-        """Crear la List View del modelo"""
-        # Class
-        mixins = import_all_mixins() + [DetailMixin]
-        View = get_base_view(BaseDetailView, mixins, self.site)
-
-        # Set attributes
-        View.__bases__ = (*self.site.detail_mixins, *View.__bases__)
-        view = View.as_view()
-        return view(request, *args, **kwargs)
+    @classmethod
+    def get_view_class(cls, site):
+        """Crear la Detail View del modelo"""
+        mixins = import_all_mixins() + [DetailMixin, ConditionalMixin]
+        return get_base_view(BaseDetailView, [*site.detail_mixins, *mixins], site)
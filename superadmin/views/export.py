@@ -0,0 +1,71 @@
+""" Export view engine """
+# Django
+from django.db.models import QuerySet
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from django.http import StreamingHttpResponse
+from django.views.generic import View
+
+# Local
+from ..exporters import EXPORTERS
+from ..services import FieldService, FilterService, PermissionService
+
+
+class ExportView(View):
+    """Stream the filtered list of the model site as a csv or xlsx file"""
+
+    site = None
+    http_method_names = [
+        "get",
+    ]
+
+    def get(self, request, *args, **kwargs):
+        model = self.site.model
+        if not PermissionService.get(request.user).has_perm(
+            f"{model._meta.app_label}.view_{model._meta.model_name}"
+        ):
+            return HttpResponseForbidden()
+
+        format = request.GET.get("format", "csv")
+        exporter_class = EXPORTERS.get(format)
+        if not exporter_class:
+            return HttpResponseBadRequest()
+
+        accessors = [
+            FieldService.get_accessor(model, name) for name in self.site.list_fields
+        ]
+        headers = [accessor.label for accessor in accessors]
+        exporter = exporter_class(headers, self.get_rows(accessors))
+
+        response = StreamingHttpResponse(exporter, content_type=exporter.content_type)
+        filename = f"{model._meta.model_name}.{exporter.extension}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def get_queryset(self):
+        """Same queryset of the list view, with session filters and search"""
+        queryset = self.site.queryset
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.all()
+        select_related, _ = self.site.list_join_plan
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        params = FilterService.get_params(self.site.model, self.request.session)
+        queryset = FilterService.filter(queryset, params)
+        search = self.request.GET.get("search")
+        return self.site.search_engine.search(queryset, search)
+
+    def get_rows(self, accessors):
+        """Iterate the queryset by chunks, so memory is flat for any size"""
+        queryset = self.get_queryset()
+        chunk_size = self.site.export_chunk_size
+        if all(accessor.column for accessor in accessors):
+            columns = [accessor.column for accessor in accessors]
+            rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+            for values in rows:
+                yield [
+                    accessor.get_column_value(value)
+                    for accessor, value in zip(accessors, values)
+                ]
+        else:
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                yield [accessor.get_value(instance) for accessor in accessors]
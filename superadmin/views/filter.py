@@ -1,30 +1,60 @@
 """ """
 # Python
+import hashlib
 from datetime import datetime
 
 # Django
 from django.apps import apps
-from django.http import JsonResponse
+from django.core.cache import caches
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic import View
 
 # Local
-from ..services import FieldService, FilterService
+from ..services import FieldService, FilterService, GenerationService
+from .. import settings
 
 
 class FilterView(View):
     http_method_names = ["get"]
+    autocomplete_params = ("term", "page")
+    cache_key = "superadmin:filter:%s"
 
     def get(self, request, *args, **kwargs):
         model = apps.get_model(self.app_name, self.model_name)
+        if FieldService.get_field_type(model, self.field) in (
+            "ForeignKey",
+            "OneToOneField",
+            "ManyToManyField",
+        ) and any(param in request.GET for param in self.autocomplete_params):
+            return self.autocomplete(model, self.field)
+        etag = self.get_etag(model, self.field)
+        if etag:
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
         lookups = self.get_lookups(model, self.field)
         choices = self.get_choices(model, self.field)
-        return JsonResponse(
+        response = JsonResponse(
             {
                 "lookups": lookups,
                 "choices": choices,
                 "type": FieldService.get_field_type(model, self.field),
             }
         )
+        if etag:
+            response["ETag"] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_etag(self, model, field):
+        """Choices only change with the data of the related model, if it is tracked"""
+        related_model = FieldService.get_field(model, field).related_model
+        if related_model and not GenerationService.is_tracked(related_model):
+            return None
+        generation = GenerationService.get(related_model) if related_model else ""
+        key = "%s:%s:%s" % (model._meta.label_lower, field, generation)
+        return f'"{hashlib.md5(key.encode()).hexdigest()}"'
 
     def setup(self, request, *args, **kwargs):
         super().setup(request, *args, **kwargs)
@@ -39,10 +69,76 @@ class FilterView(View):
         ]
         return lookups
 
+    def get_model_site(self, model):
+        from ..sites import site
+
+        return site.get_modelsite(model) if site.is_registered(model) else None
+
+    def autocomplete(self, model, field):
+        """Page of choices filtered by term, cached by related model generation"""
+        model_site = self.get_model_site(model)
+        search_fields = getattr(model_site, "filter_search_fields", {}).get(field, ())
+        page_size = getattr(model_site, "filter_page_size", settings.FILTER_PAGE_SIZE)
+        term = self.request.GET.get("term", "").strip()
+        try:
+            page = max(int(self.request.GET.get("page", 1)), 1)
+        except ValueError:
+            raise Http404
+
+        related_model = FieldService.get_field(model, field).related_model
+        if not GenerationService.is_tracked(related_model):
+            # Its changes do not bump the generation, the page can not be cached
+            return JsonResponse(
+                self.get_page(model, field, term, page, page_size, search_fields)
+            )
+        generation = GenerationService.get(related_model)
+        key = "%s:%s:%s:%s:%s:%s:%s" % (
+            model._meta.label_lower,
+            field,
+            generation,
+            ",".join(search_fields),
+            page_size,
+            page,
+            term,
+        )
+        etag = hashlib.md5(key.encode()).hexdigest()
+        response = get_conditional_response(self.request, etag=f'"{etag}"')
+        if response is not None:
+            return response
+
+        cache = caches[settings.CACHE_ALIAS]
+        data = cache.get(self.cache_key % etag)
+        if data is None:
+            data = self.get_page(model, field, term, page, page_size, search_fields)
+            cache.set(self.cache_key % etag, data, settings.FILTER_CACHE_TIMEOUT)
+        response = JsonResponse(data)
+        response["ETag"] = f'"{etag}"'
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_page(self, model, field, term, page, page_size, search_fields):
+        choices, more = FilterService.get_choices_page(
+            model, field, term, page, page_size, search_fields
+        )
+        return {
+            "lookups": self.get_lookups(model, field),
+            "choices": choices,
+            "type": FieldService.get_field_type(model, field),
+            "page": page,
+            "pagination": {"more": more},
+        }
+
     def get_choices(self, model, field):
         choices = FilterService.get_choices(model, field)
         if hasattr(choices, "model"):
-            choices = [{"id": obj.id, "text": str(obj)} for obj in choices]
+            model_site = self.get_model_site(model)
+            search_fields = getattr(model_site, "filter_search_fields", {}).get(
+                field
+            ) or FilterService.get_search_fields(choices.model)
+            choices = [
+                FilterService.get_choice(row)
+                for row in FilterService.get_choice_rows(choices, search_fields)
+            ]
         else:
             choices = [{"id": value, "text": label} for value, label in choices]
         return choices
@@ -0,0 +1,38 @@
+""" Import view engine """
+# Python
+import csv
+
+# Django
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.views.generic import View
+
+# Local
+from ..importers import CSVImporter
+from ..services import PermissionService
+
+
+class ImportView(View):
+    """Load an uploaded csv file in the model of the site, with the errors by line"""
+
+    site = None
+    http_method_names = [
+        "post",
+    ]
+
+    def post(self, request, *args, **kwargs):
+        model = self.site.model
+        perms = [f"{model._meta.app_label}.add_{model._meta.model_name}"]
+        if self.site.import_key:
+            perms.append(f"{model._meta.app_label}.change_{model._meta.model_name}")
+        if not PermissionService.get(request.user).has_perms(perms):
+            return HttpResponseForbidden()
+
+        file = request.FILES.get("file")
+        if not file:
+            return HttpResponseBadRequest()
+
+        try:
+            result = CSVImporter(self.site, file).run()
+        except (UnicodeDecodeError, ValueError, csv.Error) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return JsonResponse(result, status=200)
@@ -1,12 +1,11 @@
 """ List view engine"""
 
 # Python
-import operator
-from functools import reduce
+from types import SimpleNamespace
 
 # Django
 from django.core.paginator import InvalidPage
-from django.db.models import Q
+from django.db.models import QuerySet
 from django.http import Http404
 from django.utils.translation import gettext as _
 from django.views.generic import ListView as BaseListView
@@ -14,12 +13,12 @@ from django.views.generic import ListView as BaseListView
 
 # Local
 
-from .base import SiteView, get_base_view
-from ..shortcuts import get_urls_of_site
+from .base import ConditionalMixin, SiteView, get_base_view
+from ..paginators import CursorPaginator, Paginator
 from ..utils import import_mixin, import_all_mixins
 
 # Utilities
-from ..services import FieldService
+from ..services import CountService, FacetService, FieldService, QueryService
 
 
 class ListMixin:
@@ -27,35 +26,18 @@ class ListMixin:
 
     allow_empty = True
     action = "list"
+    paginator_class = Paginator
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        search_params = self.request.GET
-        if search_params:
-            params = search_params.dict()
-            search = params.pop("search", None)
-            params.pop("page", None)
-            params.pop("paginate_by", None)
-            model_site = self.site
-            if (
-                search
-                and hasattr(model_site, "search_params")
-                and isinstance(model_site.search_params, (list, tuple))
-                and model_site.search_params
-            ):
-                search = search.replace("+", ",").replace(";", ",")
-                search_split = search.split(",")
-                for search_value in search_split:
-                    filters = {
-                        key: search_value.strip() for key in model_site.search_params
-                    }
-                    params.update(**filters)
-                    args = [Q(**{key: value}) for key, value in filters.items()]
-                    queryset = queryset.filter(reduce(operator.__or__, args))
-        return queryset
+        queryset = QueryService.apply_join_plan(queryset, self.site.list_join_plan)
+        search = self.request.GET.get("search")
+        return self.site.search_engine.search(queryset, search)
 
     def paginate_queryset(self, queryset, page_size):
         """Paginate the queryset, if needed."""
+        if self.site.cursor_pagination:
+            return self.paginate_cursor(queryset, page_size)
         paginator = self.get_paginator(
             queryset,
             page_size,
@@ -74,7 +56,8 @@ class ListMixin:
                     _("Page is not “last”, nor can it be converted to an int.")
                 )
         try:
-            if page_number > paginator.num_pages:
+            # An estimated count can be short, its pages are not limited
+            if page_number > paginator.num_pages and not paginator.estimated:
                 page_number = paginator.num_pages
             page = paginator.page(page_number)
             return paginator, page, page.object_list, page.has_other_pages()
@@ -84,28 +67,60 @@ class ListMixin:
                 % {"page_number": page_number, "message": str(e)}
             )
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        counter = CountService.get_for_request(self.request, self.site)
+        return super().get_paginator(queryset, per_page, counter=counter, **kwargs)
+
+    def paginate_cursor(self, queryset, page_size):
+        """Paginate with keyset cursors, the page param is an opaque cursor"""
+        paginator = CursorPaginator(queryset, page_size, order_by=self.site.order_by)
+        page_kwarg = self.page_kwarg
+        cursor = self.kwargs.get(page_kwarg) or self.request.GET.get(page_kwarg)
+        try:
+            page = paginator.page(cursor)
+        except InvalidPage as e:
+            raise Http404(_("Invalid page: %(message)s") % {"message": str(e)})
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update(self.site.list_extra_context)
         opts = {
             "fields": self.get_list_fields(),
             "rows": self.get_rows(context["object_list"]),
-            "page_start_index": context["page_obj"].start_index()
-            if context["is_paginated"]
-            else 1,
-            "page_end_index": context["page_obj"].end_index()
-            if context["is_paginated"]
-            else context["object_list"].count(),
-            "total_records": context["paginator"].count
-            if context["is_paginated"]
-            else context["object_list"].count(),
         }
+        if self.site.cursor_pagination:
+            # The cursors do not count, the position in the list is unknown
+            opts.update(
+                {
+                    "page_start_index": None,
+                    "page_end_index": None,
+                    "total_records": None,
+                }
+            )
+        elif context["is_paginated"]:
+            opts.update(
+                {
+                    "page_start_index": context["page_obj"].start_index(),
+                    "page_end_index": context["page_obj"].end_index(),
+                    "total_records": context["paginator"].count,
+                }
+            )
+        else:
+            counter = CountService.get_for_request(self.request, self.site)
+            total = counter.count(context["object_list"])
+            opts.update(
+                {"page_start_index": 1, "page_end_index": total, "total_records": total}
+            )
         if (
             hasattr(self.site, "search_params")
             and isinstance(self.site.search_params, (list, tuple))
             and self.site.search_params
         ):
             opts.update({"search_params": self.site.search_params})
+        if self.site.list_facets:
+            facets = FacetService.get_facets(self.site, self.object_list)
+            opts.update({"facets": facets})
         if "site" in context:
             context["site"].update(opts)
         else:
@@ -133,39 +148,75 @@ class ListMixin:
         ]
         return fields
 
+    def get_accessors(self):
+        return [
+            FieldService.get_accessor(self.model, name)
+            for name in self.site.list_fields
+        ]
+
+    def has_values_rows(self, queryset, accessors):
+        """Says if rows can be rendered from values_list() tuples"""
+        return (
+            self.site.list_values
+            and isinstance(queryset, QuerySet)
+            and all(accessor.column for accessor in accessors)
+        )
+
     def get_rows(self, queryset):
+        accessors = self.get_accessors()
+        if self.has_values_rows(queryset, accessors):
+            return self.get_values_rows(queryset, accessors)
+        url_service = self.site.url_service
+        actions = url_service.get_actions(self.request.user)
         rows = [
             {
                 "instance": instance,
-                "values": self.get_values(instance),
-                "urls": get_urls_of_site(
-                    self.site, object=instance, user=self.request.user
-                ),
+                "values": self.get_values(instance, accessors),
+                "urls": url_service.get_urls(instance, actions),
             }
             for instance in queryset
         ]
         return rows
 
-    def get_values(self, instance):
-        values = [
-            FieldService.get_field_value(instance, name)
-            for name in self.site.list_fields
-        ]
+    def get_values_rows(self, queryset, accessors):
+        """Rows from tuples of values, without instantiate the models"""
+        keys = ["pk"]
+        if hasattr(self.model, self.site.slug_field):
+            keys.append(self.site.slug_field)
+        columns = [accessor.column for accessor in accessors]
+        queryset = queryset.prefetch_related(None).values_list(*keys, *columns)
+        url_service = self.site.url_service
+        actions = url_service.get_actions(self.request.user)
+        rows = []
+        for values in queryset:
+            instance = SimpleNamespace(**dict(zip(keys, values)))
+            rows.append(
+                {
+                    "instance": instance,
+                    "values": [
+                        accessor.get_column_value(value)
+                        for accessor, value in zip(accessors, values[len(keys) :])
+                    ],
+                    "urls": url_service.get_urls(instance, actions),
+                }
+            )
+        return rows
+
+    def get_values(self, instance, accessors=None):
+        accessors = accessors or self.get_accessors()
+        values = [accessor.get_value(instance) for accessor in accessors]
         return values
 
 
 class ListView(SiteView):
-    def view(self, request, *args, **kwargs):
+    @classmethod
+    def get_view_class(cls, site):
         """Crear la List View del modelo"""
-        # Class
         FilterMixin = import_mixin("FilterMixin")
-        mixins = import_all_mixins() + [FilterMixin, ListMixin]
-        View = get_base_view(BaseListView, mixins, self.get_site())
-
-        # Set attriburtes
-        View.paginate_by = self.site.paginate_by
-
-        View.__bases__ = (*self.site.list_mixins, *View.__bases__)
-
-        view = View.as_view()
-        return view(request, *args, **kwargs)
+        mixins = import_all_mixins() + [FilterMixin, ListMixin, ConditionalMixin]
+        return get_base_view(
+            BaseListView,
+            [*site.list_mixins, *mixins],
+            site,
+            paginate_by=site.paginate_by,
+        )
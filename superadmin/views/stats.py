@@ -0,0 +1,19 @@
+""" Stats of the instrumented views """
+# Django
+from django.http import HttpResponseForbidden, JsonResponse
+from django.views.generic import View
+
+# Local
+from ..instrumentation import RingBufferSink
+
+
+class StatsView(View):
+    """Summary by model site and action of the last requests, only for staff"""
+
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        if not (user.is_authenticated and user.is_active and user.is_staff):
+            return HttpResponseForbidden()
+        return JsonResponse({"stats": RingBufferSink.get_stats()})
@@ -1,12 +1,15 @@
 """ Update View engine """
 # Django
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.views.generic import View
 from django.views.generic import UpdateView as BaseUpdateView
 from django.http import HttpResponseForbidden, JsonResponse
 
 # Local
 from .base import SiteView, get_base_view
-from ..services import FilterService
+from .batch import get_batch_response
+from ..batches import BatchService
+from ..services import CountService, FilterService, NeighborService, PermissionService
 from ..shortcuts import get_urls_of_site
 from ..utils import import_all_mixins, import_mixin
 
@@ -20,7 +23,13 @@ class UpdateMixin:
         context = super().get_context_data(**kwargs)
         params = FilterService.get_params(self.site.model, self.request.session)
         queryset = FilterService.filter(self.site.queryset, params)
-        nav = FilterService.get_previous_and_next(queryset, self.object)
+        nav = NeighborService.get_previous_and_next(
+            queryset,
+            self.object,
+            order_by=self.site.order_by,
+            counter=CountService.get_for_request(self.request, self.site),
+            position=self.site.navigation_position,
+        )
         if nav:
             nav["previous_url"] = (
                 get_urls_of_site(self.site, nav["previous"])[self.action]
@@ -49,29 +58,25 @@ class UpdateMixin:
 
 
 class UpdateView(SiteView):
-    def view(self, request, *args, **kwargs):
-        """Crear la List View del modelo"""
-        # Class
+    @classmethod
+    def get_view_class(cls, site):
+        """Crear la Update View del modelo"""
         mixins = import_all_mixins() + [UpdateMixin]
-        if self.site.inlines and isinstance(self.site.inlines, (list, tuple, dict)):
+        if site.inlines and isinstance(site.inlines, (list, tuple, dict)):
             InlinesMixin = import_mixin("InlinesMixin")
 
             class Inlines(InlinesMixin):
-                inlines = self.site.inlines
+                inlines = site.inlines
 
             mixins += [Inlines]
-
-        View = get_base_view(BaseUpdateView, mixins, self.get_site())
-
-        # Set attribures
-        View.form_class = self.site.form_class
-        View.fields = self.site.fields
-        if self.site.update_mixins:
-            View.__bases__ = (*self.site.update_mixins, *View.__bases__)
-        else:
-            View.__bases__ = (*self.site.form_mixins, *View.__bases__)
-        view = View.as_view()
-        return view(request, *args, **kwargs)
+        site_mixins = site.update_mixins or site.form_mixins
+        return get_base_view(
+            BaseUpdateView,
+            [*site_mixins, *mixins],
+            site,
+            form_class=site.form_class,
+            fields=site.fields,
+        )
 
 
 class MassUpdateView(View):
@@ -86,17 +91,33 @@ class MassUpdateView(View):
         field = request.POST.get("field")
         value = request.POST.get("value")
 
-        if not self.request.user.has_perm(
-            f"{model._meta.app_label}.update_{model._meta.model_name}"
+        if not PermissionService.get(self.request.user).has_perm(
+            f"{model._meta.app_label}.change_{model._meta.model_name}"
         ):
             return HttpResponseForbidden()
 
-        if not hasattr(model, field):
+        try:
+            model_field = model._meta.get_field(field or "")
+        except FieldDoesNotExist:
             return JsonResponse({"error": "El campo indicado no existe."}, status=400)
-
-        objects = model.objects.filter(id__in=ids)
-        objects.update(**{field: value})
-
-        return JsonResponse(
-            {"success": f"{len(objects)} objectos actualizados."}, status=200
+        if (
+            not model_field.concrete
+            or model_field.many_to_many
+            or model_field.primary_key
+        ):
+            return JsonResponse(
+                {"error": "El campo indicado no se puede actualizar."}, status=400
+            )
+        try:
+            value = model_field.to_python(value)
+        except ValidationError as e:
+            return JsonResponse({"error": " ".join(e.messages)}, status=400)
+
+        job = BatchService.run(
+            self.site,
+            BatchService.UPDATE,
+            ids,
+            values={model_field.attname: value},
+            user=request.user,
         )
+        return get_batch_response(self.site, job, "objectos actualizados")